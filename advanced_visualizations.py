@@ -26,7 +26,7 @@ def create_population_pie_chart(data, selected_cities):
         return fig
     
     # Get the latest year's data for each city
-    latest_data = data.loc[data.groupby('city')['year'].idxmax()]
+    latest_data = data.loc[data.groupby('city', observed=True)['year'].idxmax()]
     
     # Filter for selected cities
     city_data = latest_data[latest_data['city'].isin(selected_cities)]
@@ -295,7 +295,7 @@ def create_population_dashboard(data, selected_cities):
     )
     
     # Latest year data for pie chart
-    latest_data = data.loc[data.groupby('city')['year'].idxmax()]
+    latest_data = data.loc[data.groupby('city', observed=True)['year'].idxmax()]
     latest_data = latest_data[latest_data['city'].isin(selected_cities)]
     latest_data = latest_data.sort_values('population', ascending=False)
     
@@ -4,12 +4,13 @@ import plotly.express as px
 import plotly.graph_objects as go
 import time
 import os
-from scraper import scrape_population_data, load_cached_data
+from scraper import scrape_population_data, load_cached_data, read_cache_last_updated
 from data_processor import process_data, calculate_statistics
-from visualizer import create_flow_map, create_trend_chart, create_comparison_chart
 from advanced_visualizations import create_population_pie_chart, create_growth_bar_chart, create_population_dashboard
 from utils import get_guangdong_cities
 from translations import get_translation, LANGUAGES
+from exports import to_csv_bytes, to_excel_bytes
+from cached_visualizations import cached_flow_map, cached_trend_chart, cached_comparison_chart
 
 # Set page configuration
 st.set_page_config(
@@ -37,10 +38,16 @@ def toggle_language():
 
 # This function is cached and contains no Streamlit UI elements
 @st.cache_data(ttl=7200)  # Extended TTL to 2 hours for better performance
-def _load_data_core(force_refresh=False):
+def _load_data_core(force_refresh=False, cache_version=0):
     """
     Core data loading function (without UI elements) for caching
 
+    Args:
+        force_refresh (bool): Scrape the web sources even if other data is available
+        cache_version (float): The cache file's last_updated time. It is not used in the
+            body; as part of the cache key it makes Streamlit reload the data as soon as a
+            background refresh rewrites the cache, instead of after the 2 hour TTL
+
     Returns:
         tuple: (data, source_info, error_info)
     """
@@ -49,6 +56,7 @@ def _load_data_core(force_refresh=False):
         data_sources = []
         source_labels = []
         errors = []
+        scraped = False  # Whether any data came from the live web sources
 
         # 1. Try to load from local cache first (fastest)
         cached_data = load_cached_data()
@@ -68,42 +76,37 @@ def _load_data_core(force_refresh=False):
 
         # 3. If still no data or force_refresh, scrape from web sources
         if not data_sources or force_refresh:
-            # Only scrape the necessary parts to avoid unnecessary web requests
-            from scraper import scrape_bl_gov_cn, scrape_stats_gd_gov_cn, scrape_supplementary_sources
+            # Scrape all web sources concurrently; each source fails independently
+            from scraper import scrape_web_sources
 
-            # Try each source independently to ensure we get as much data as possible
             try:
-                bl_data = scrape_bl_gov_cn()
-                if not bl_data.empty:
-                    data_sources.append(bl_data)
-                    source_labels.append("Government")
+                web_data = scrape_web_sources()
             except Exception as e:
-                errors.append(f"Error scraping bl.gov.cn: {str(e)}")
-
-            try:
-                stats_data = scrape_stats_gd_gov_cn()
-                if not stats_data.empty:
-                    data_sources.append(stats_data)
-                    source_labels.append("Statistics")
-            except Exception as e:
-                errors.append(f"Error scraping stats.gd.gov.cn: {str(e)}")
-
-            try:
-                supp_data = scrape_supplementary_sources()
-                if not supp_data.empty:
-                    data_sources.append(supp_data)
-                    source_labels.append("Supplementary")
-            except Exception as e:
-                errors.append(f"Error scraping supplementary sources: {str(e)}")
+                errors.append(f"Error scraping web sources: {str(e)}")
+                web_data = {}
+
+            for source, label in [
+                ('bl_gov_cn', "Government"),
+                ('stats_gd_gov_cn', "Statistics"),
+                ('supplementary', "Supplementary")
+            ]:
+                source_data = web_data.get(source)
+                if source_data is not None and not source_data.empty:
+                    data_sources.append(source_data)
+                    source_labels.append(label)
+                    scraped = True
 
         # Merge all available data sources
         if data_sources:
             from scraper import merge_and_clean_data
             data = merge_and_clean_data(data_sources)
 
-            # Save the merged data to cache for future use
-            from scraper import save_to_cache
-            save_to_cache(data)
+            # Save the merged data to cache for future use, but only when it includes
+            # freshly scraped data; re-saving a stale cache would stamp it as fresh and
+            # hide the expiry that triggers the background refresh
+            if scraped:
+                from scraper import save_to_cache
+                save_to_cache(data)
 
             return data, {
                 "sources": source_labels,
@@ -133,7 +136,9 @@ def load_data():
 
     with st.spinner(t('loading_data')):
         # Call the cached core function
-        data, source_info, errors = _load_data_core(force_refresh=force_refresh)
+        data, source_info, errors = _load_data_core(
+            force_refresh=force_refresh, cache_version=read_cache_last_updated()
+        )
 
     # Reset force refresh flag if it was used
     if force_refresh:
@@ -349,17 +354,17 @@ if data is not None and not data.empty:
 
     with tab1:
         st.subheader(t('population_flow_map_title'))
-        flow_map = create_flow_map(processed_data, selected_cities, analysis_type)
+        flow_map = cached_flow_map(processed_data, selected_cities, analysis_type)
         st.plotly_chart(flow_map, use_container_width=True, key="flow_map_chart")
 
     with tab2:
         st.subheader(t('trend_analysis_title'))
-        trend_chart = create_trend_chart(processed_data, show_trend_lines, normalize_data)
+        trend_chart = cached_trend_chart(processed_data, show_trend_lines, normalize_data)
         st.plotly_chart(trend_chart, use_container_width=True, key="trend_chart")
 
     with tab3:
         st.subheader(t('city_comparison_title'))
-        comparison_chart = create_comparison_chart(processed_data, selected_cities)
+        comparison_chart = cached_comparison_chart(processed_data, selected_cities)
         st.plotly_chart(comparison_chart, use_container_width=True, key="comparison_chart")
 
     with tab4:
@@ -468,20 +473,15 @@ if data is not None and not data.empty:
         # Download options
         st.download_button(
             label=t('download_csv'),
-            data=processed_data.to_csv(index=False).encode('utf-8'),
+            data=to_csv_bytes(processed_data),
             file_name=f"guangdong_population_data_{selected_period}.csv",
             mime='text/csv'
         )
 
-        # For Excel download, we need to use BytesIO
-        from io import BytesIO
-        excel_buffer = BytesIO()
-        processed_data.to_excel(excel_buffer, index=False)
-        excel_data = excel_buffer.getvalue()
-
+        # For Excel download, serialize in memory (cached while the data is unchanged)
         st.download_button(
             label=t('download_excel'),
-            data=excel_data,
+            data=to_excel_bytes(processed_data),
             file_name=f"guangdong_population_data_{selected_period}.xlsx",
             mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
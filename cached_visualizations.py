@@ -0,0 +1,26 @@
+"""
+Visualizer figures memoized with Streamlit's cache, shared by app.py and streamlit_app.py.
+
+Reruns that leave the data and chart options unchanged reuse the cached figure instead of
+rebuilding it. The visualizer is imported on first use so the page can paint before it loads.
+"""
+
+import streamlit as st
+
+@st.cache_data(show_spinner=False)
+def cached_flow_map(data, selected_cities, analysis_type):
+    """Flow map figure, rebuilt only when the data, cities or analysis type change"""
+    from visualizer import create_flow_map
+    return create_flow_map(data, selected_cities, analysis_type)
+
+@st.cache_data(show_spinner=False)
+def cached_trend_chart(data, show_trend_lines=True, normalize_data=False):
+    """Trend chart figure, rebuilt only when the data or chart options change"""
+    from visualizer import create_trend_chart
+    return create_trend_chart(data, show_trend_lines, normalize_data)
+
+@st.cache_data(show_spinner=False)
+def cached_comparison_chart(data, selected_cities):
+    """Comparison chart figure, rebuilt only when the data or cities change"""
+    from visualizer import create_comparison_chart
+    return create_comparison_chart(data, selected_cities)
@@ -0,0 +1,18 @@
+"""
+Shared pytest fixtures.
+"""
+
+import pytest
+
+import scraper
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Point the scraper's cache files at a temporary directory so tests never write to cache/"""
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setattr(scraper, 'CACHE_DIR', str(cache_dir))
+    monkeypatch.setattr(scraper, 'CACHE_FILE', str(cache_dir / 'population_data.parquet'))
+    monkeypatch.setattr(scraper, 'CACHE_REFRESH_MARKER', str(cache_dir / 'refresh_started'))
+    monkeypatch.setattr(scraper, 'HTTP_CACHE_DIR', str(cache_dir / 'http'))
+    monkeypatch.setattr(scraper, 'EXTRACT_CACHE_DIR', str(cache_dir / 'extract'))
+    return cache_dir
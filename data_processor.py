@@ -12,32 +12,21 @@ from datetime import datetime
 _CACHE = {}
 _CACHE_TTL = 3600  # 1 hour cache validity
 
-def validate_data_point(row):
-    """Validate a single data point"""
-    try:
-        # Basic validation rules
-        if not row['city'].strip().endswith('市'):
-            return False
+def validate_data_points(df):
+    """Validate every data point at once, returning a boolean mask of valid rows"""
+    # Basic validation rules
+    valid = df['city'].astype(str).str.strip().str.endswith('市')
+    valid &= df['year'].between(2000, datetime.now().year)
 
-        current_year = datetime.now().year
-        if not (2000 <= row['year'] <= current_year):
-            return False
+    # Sanity checks for extreme values; no city should have > 50M population
+    population = df['population']
+    valid &= ~(population <= 0) & ~(population > 50000000)
 
-        if row['population'] <= 0:
-            return False
-
-        # Sanity checks for extreme values
-        if row['population'] > 50000000:  # No city should have > 50M population
-            return False
-
-        # Check if change is reasonable if it exists
-        if 'change' in row and pd.notna(row['change']):
-            if abs(row['change']) > row['population'] * 0.5:  # Change shouldn't be >50% of population
-                return False
+    # Check if change is reasonable if it exists; change shouldn't be >50% of population
+    if 'change' in df.columns:
+        valid &= ~(df['change'].abs() > population * 0.5)
 
-        return True
-    except:
-        return False
+    return valid
 
 def clean_and_standardize(df):
     """Clean and standardize the dataframe"""
@@ -52,13 +41,13 @@ def clean_and_standardize(df):
 
     # Fill missing changes
     if 'change' in df.columns:
-        df['change'] = df.groupby('city')['population'].diff().fillna(0)
+        df['change'] = df.groupby('city', observed=True)['population'].diff().fillna(0)
 
     # Calculate growth rates
-    df['growth_rate'] = df.groupby('city')['population'].pct_change().fillna(0) * 100
+    df['growth_rate'] = df.groupby('city', observed=True)['population'].pct_change().fillna(0) * 100
 
     # Add rolling metrics
-    df['rolling_growth'] = df.groupby('city')['growth_rate'].rolling(window=3, min_periods=1).mean().reset_index(0, drop=True)
+    df['rolling_growth'] = df.groupby('city', observed=True)['growth_rate'].rolling(window=3, min_periods=1).mean().reset_index(0, drop=True)
 
     # Detect and handle outliers
     for city in df['city'].unique():
@@ -77,7 +66,8 @@ def cache_result(func):
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         # Create a cache key from arguments
-        key_parts = [str(arg) for arg in args]
+        key_parts = [func.__name__]
+        key_parts.extend(str(arg) for arg in args)
         key_parts.extend([f"{k}={v}" for k, v in sorted(kwargs.items())])
         cache_key = hashlib.md5(str(key_parts).encode()).hexdigest()
 
@@ -105,39 +95,42 @@ def cache_result(func):
 @cache_result
 def process_data(data, selected_cities, time_period, analysis_type):
     """Process population data with enhanced validation and analysis"""
-    # Filter by cities
-    filtered_data = data[data['city'].isin(selected_cities)].copy()
-
-    # Filter by time period
+    # Filter by cities and time period with one combined mask, so the frame is
+    # copied once instead of once per filter
     year_start, year_end = map(int, time_period.split('-'))
-    year_filter = (filtered_data['year'] >= year_start) & (filtered_data['year'] <= year_end)
-    filtered_data = filtered_data[year_filter]
+    city_filter = data['city'].isin(selected_cities)
+    year_filter = (data['year'] >= year_start) & (data['year'] <= year_end)
+    filtered_data = data[city_filter & year_filter].copy()
 
     # Apply cleaning and standardization
     filtered_data = clean_and_standardize(filtered_data)
 
     # Validate each data point
-    valid_data = filtered_data[filtered_data.apply(validate_data_point, axis=1)]
+    valid_data = filtered_data[validate_data_points(filtered_data)]
+    if isinstance(valid_data['city'].dtype, pd.CategoricalDtype):
+        # Drop categories for cities with no rows left after filtering and validation,
+        # so downstream groupbys and charts only see observed cities
+        valid_data = valid_data.assign(city=valid_data['city'].cat.remove_unused_categories())
 
     # Ensure 'change' column exists
     if 'change' not in valid_data.columns and len(valid_data) > 0:
-        valid_data['change'] = valid_data.groupby('city')['population'].diff().fillna(0)
+        valid_data['change'] = valid_data.groupby('city', observed=True)['population'].diff().fillna(0)
 
     # Calculate migration efficiency
     if len(valid_data) > 0:
-        valid_data['net_migration'] = valid_data.groupby('city')['change'].rolling(window=2, min_periods=1).sum().reset_index(0, drop=True)
+        valid_data['net_migration'] = valid_data.groupby('city', observed=True)['change'].rolling(window=2, min_periods=1).sum().reset_index(0, drop=True)
         valid_data['migration_efficiency'] = valid_data['net_migration'] / valid_data['population'].where(valid_data['population'] > 0, 0)
 
     # Process based on analysis type
     if "inflow" in analysis_type.lower():
-        valid_data['analysis_value'] = valid_data['change'].apply(lambda x: x if x > 0 else 0)
+        valid_data['analysis_value'] = np.where(valid_data['change'] > 0, valid_data['change'], 0)
     elif "outflow" in analysis_type.lower():
-        valid_data['analysis_value'] = valid_data['change'].apply(lambda x: -x if x < 0 else 0)
+        valid_data['analysis_value'] = np.where(valid_data['change'] < 0, -valid_data['change'], 0)
     else:  # Net migration
         valid_data['analysis_value'] = valid_data['change']
 
     # Calculate additional metrics
-    valid_data['cumulative_change'] = valid_data.groupby('city')['change'].cumsum()
+    valid_data['cumulative_change'] = valid_data.groupby('city', observed=True)['change'].cumsum()
     valid_data['percent_of_total'] = valid_data.groupby('year')['population'].transform(lambda x: x / x.sum() * 100)
 
     # Generate migration reasons if they don't exist
@@ -172,11 +165,14 @@ def calculate_statistics(data, confidence_level=0.95):
     if 'migration_reasons' in data.columns:
         stats_dict['migration_reasons'] = {}
 
-        # Overall reason distribution
+        # Overall and per-city reason lists, collected in one pass over the rows
         all_reasons = []
-        for reasons in data['migration_reasons'].dropna():
+        city_reason_lists = {city: [] for city in data['city'].dropna().unique()}
+        for city, reasons in zip(data['city'], data['migration_reasons']):
             if isinstance(reasons, list):
                 all_reasons.extend(reasons)
+                if city in city_reason_lists:
+                    city_reason_lists[city].extend(reasons)
 
         if all_reasons:
             from collections import Counter
@@ -193,13 +189,7 @@ def calculate_statistics(data, confidence_level=0.95):
 
             # Top reasons by city
             city_reasons = {}
-            for city in data['city'].unique():
-                city_data = data[data['city'] == city]
-                city_reasons_list = []
-                for reasons in city_data['migration_reasons'].dropna():
-                    if isinstance(reasons, list):
-                        city_reasons_list.extend(reasons)
-
+            for city, city_reasons_list in city_reason_lists.items():
                 if city_reasons_list:
                     city_reason_counts = Counter(city_reasons_list)
                     city_reasons[city] = {
@@ -246,14 +236,14 @@ def calculate_statistics(data, confidence_level=0.95):
         outflow = data[data['change'] < 0]
 
         if not inflow.empty:
-            highest_inflow_city = inflow.groupby('city')['change'].sum().idxmax()
-            stats_dict['highest_inflow_city'] = highest_inflow_city
-            stats_dict['highest_inflow_amount'] = inflow.groupby('city')['change'].sum().max()
+            inflow_by_city = inflow.groupby('city', observed=True)['change'].sum()
+            stats_dict['highest_inflow_city'] = inflow_by_city.idxmax()
+            stats_dict['highest_inflow_amount'] = inflow_by_city.max()
 
         if not outflow.empty:
-            highest_outflow_city = outflow.groupby('city')['change'].sum().idxmin()
-            stats_dict['highest_outflow_city'] = highest_outflow_city
-            stats_dict['highest_outflow_amount'] = outflow.groupby('city')['change'].sum().min()
+            outflow_by_city = outflow.groupby('city', observed=True)['change'].sum()
+            stats_dict['highest_outflow_city'] = outflow_by_city.idxmin()
+            stats_dict['highest_outflow_amount'] = outflow_by_city.min()
 
     return stats_dict
 
@@ -278,45 +268,26 @@ def calculate_flow_indices(data):
     result['net_migration_rate'] = result['change'] / result['population'] * 100
 
     # Calculate migration efficiency
-    # Group by city and year to calculate total inflow and outflow
+    # Total inflow and outflow for each city and year, broadcast back onto its rows
     if 'flow_type' in result:
-        city_year_groups = result.groupby(['city', 'year'])
-
-        # Calculate inflow and outflow for each city and year
-        inflows = []
-        outflows = []
-
-        for (city, year), group in city_year_groups:
-            inflow = group[group['flow_type'] == 'inflow']['change'].sum()
-            outflow = -group[group['flow_type'] == 'outflow']['change'].sum()
-
-            inflows.append({
-                'city': city,
-                'year': year,
-                'inflow': inflow
-            })
-
-            outflows.append({
-                'city': city,
-                'year': year,
-                'outflow': outflow
-            })
-
-        # Convert to DataFrames
-        inflow_df = pd.DataFrame(inflows)
-        outflow_df = pd.DataFrame(outflows)
-
-        # Merge back with the original data
-        if not inflow_df.empty and not outflow_df.empty:
-            flow_df = pd.merge(inflow_df, outflow_df, on=['city', 'year'])
+        result = result.reset_index(drop=True)
+        flows = pd.DataFrame({
+            'inflow': result['change'].where(result['flow_type'] == 'inflow', 0),
+            'outflow': -result['change'].where(result['flow_type'] == 'outflow', 0)
+        })
+        city_year_groups = flows.groupby([result['city'], result['year']], observed=True)
+
+        if city_year_groups.ngroups > 0:
+            flow_df = city_year_groups.transform('sum')
             flow_df['gross_migration'] = flow_df['inflow'] + flow_df['outflow']
             flow_df['net_migration'] = flow_df['inflow'] - flow_df['outflow']
-            flow_df['migration_efficiency'] = flow_df.apply(
-                lambda row: row['net_migration'] / row['gross_migration'] if row['gross_migration'] > 0 else 0,
-                axis=1
-            )
-
-            # Merge the calculated indices back to the result
-            result = pd.merge(result, flow_df, on=['city', 'year'], how='left')
+            # Rows whose city or year is missing belong to no group and stay NaN
+            gross = flow_df['gross_migration']
+            efficiency = (flow_df['net_migration'] / gross.where(gross > 0)).fillna(0.0)
+            flow_df['migration_efficiency'] = efficiency.where(gross.notna())
+
+            # Join the calculated indices back to the result; overlapping columns
+            # get the same _x/_y suffixes a merge on city and year would give
+            result = result.join(flow_df, lsuffix='_x', rsuffix='_y')
 
     return result
@@ -0,0 +1,23 @@
+"""
+Download helpers shared by app.py and streamlit_app.py.
+"""
+
+from io import BytesIO
+
+import pandas as pd
+import streamlit as st
+
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df):
+    """Serialize a DataFrame to UTF-8 CSV bytes, reused while the data is unchanged"""
+    return df.to_csv(index=False).encode('utf-8')
+
+@st.cache_data(show_spinner=False)
+def to_excel_bytes(df):
+    """Serialize a DataFrame to XLSX bytes in memory, reused while the data is unchanged"""
+    excel_buffer = BytesIO()
+    # xlsxwriter writes about twice as fast as openpyxl; constant_memory mode is avoided
+    # because it drops cells once pandas moves past their row
+    with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False)
+    return excel_buffer.getvalue()
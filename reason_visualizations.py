@@ -4,6 +4,17 @@ from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 
+def aggregate_reason_values(data):
+    """
+    Sum each row's absolute population change, shared equally among its migration reasons,
+    per city and reason
+    """
+    has_reasons = data['migration_reasons'].map(lambda reasons: isinstance(reasons, list) and len(reasons) > 0)
+    rows = data.loc[has_reasons, ['city', 'change', 'migration_reasons']]
+    rows = rows.assign(value=rows['change'].abs().fillna(0) / rows['migration_reasons'].str.len())
+    rows = rows.explode('migration_reasons').rename(columns={'migration_reasons': 'reason'})
+    return rows.groupby(['city', 'reason'], observed=True, sort=False)['value'].sum().reset_index()
+
 def create_reason_sankey(data):
     """
     Create a Sankey diagram showing flow of population between cities and their reasons
@@ -11,41 +22,17 @@ def create_reason_sankey(data):
     if 'migration_reasons' not in data.columns:
         return None
 
-    # Process data for Sankey diagram
-    cities = data['city'].unique()
-    all_reasons = set()
-    for reasons in data['migration_reasons'].dropna():
-        if isinstance(reasons, list) and len(reasons) > 0:
-            all_reasons.update(reasons)
-
-    if not all_reasons:
+    # Aggregate to one link per city and reason before handing it to Plotly
+    reason_values = aggregate_reason_values(data)
+    if reason_values.empty:
         return None
 
     # Create nodes
+    cities = data['city'].unique()
+    all_reasons = reason_values['reason'].unique()
     nodes = list(cities) + list(all_reasons)
     node_indices = {node: idx for idx, node in enumerate(nodes)}
 
-    # Create links
-    links = []
-
-    for _, row in data.iterrows():
-        reasons = row['migration_reasons']
-        if isinstance(reasons, list) and len(reasons) > 0:
-            city = row['city']
-            population_change = abs(row['change']) if pd.notna(row['change']) else 0
-
-            # Distribute population change among reasons
-            value_per_reason = population_change / len(reasons)
-            for reason in reasons:
-                links.append({
-                    'source': node_indices[city],
-                    'target': node_indices[reason],
-                    'value': value_per_reason
-                })
-
-    if not links:
-        return None
-
     # Create Sankey diagram
     fig = go.Figure(data=[go.Sankey(
         node=dict(
@@ -57,9 +44,9 @@ def create_reason_sankey(data):
                   ["rgba(255, 127, 14, 0.8)"]*len(all_reasons)
         ),
         link=dict(
-            source=[link['source'] for link in links],
-            target=[link['target'] for link in links],
-            value=[link['value'] for link in links]
+            source=reason_values['city'].map(node_indices).tolist(),
+            target=reason_values['reason'].map(node_indices).tolist(),
+            value=reason_values['value'].tolist()
         )
     )])
 
@@ -131,26 +118,11 @@ def create_reason_treemap(data):
     if 'migration_reasons' not in data.columns:
         return None
 
-    # Process data for treemap
-    treemap_data = []
-
-    for _, row in data.iterrows():
-        city = row['city']
-        reasons = row['migration_reasons']
-        if isinstance(reasons, list) and len(reasons) > 0:
-            population_change = abs(row['change']) if pd.notna(row['change']) else 0
-
-            for reason in reasons:
-                treemap_data.append({
-                    'City': city,
-                    'Reason': reason,
-                    'Value': population_change / len(reasons)
-                })
-
-    if not treemap_data:
+    # Pre-aggregate per reason and city so the treemap is built from the totals
+    df = aggregate_reason_values(data)
+    if df.empty:
         return None
-
-    df = pd.DataFrame(treemap_data)
+    df = df.rename(columns={'city': 'City', 'reason': 'Reason', 'value': 'Value'})
 
     fig = px.treemap(
         df,
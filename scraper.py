@@ -1,31 +1,46 @@
-import aiohttp
 import asyncio
+import hashlib
 import os
-import requests
 import pandas as pd
-import json
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+import threading
 import time
-import trafilatura
-from bs4 import BeautifulSoup
+import weakref
+from contextlib import asynccontextmanager
+from bs4 import UnicodeDammit
+import lxml.etree
+import lxml.html
 import re
+import tempfile
+import zlib
+from urllib.parse import urljoin, urlparse
 from datetime import datetime
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 from fake_useragent import UserAgent
-from concurrent.futures import ThreadPoolExecutor
 
 # Cache file constants
 CACHE_DIR = "cache"
-CACHE_FILE = os.path.join(CACHE_DIR, "population_data.csv")
-CACHE_METADATA = os.path.join(CACHE_DIR, "metadata.json")
+CACHE_FILE = os.path.join(CACHE_DIR, "population_data.parquet")
+CACHE_METADATA_KEY = b'cache_metadata'  # Parquet schema metadata key holding last_updated etc.
+CACHE_REFRESH_MARKER = os.path.join(CACHE_DIR, "refresh_started")  # Start time of a running refresh
 CACHE_EXPIRY = 86400  # 24 hours in seconds
-
-# Configure retry strategy
-retry_strategy = Retry(
-    total=3,  # number of retries
-    backoff_factor=1,  # wait 1, 2, 4 seconds between retries
-    status_forcelist=[500, 502, 503, 504]  # HTTP status codes to retry on
-)
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, "http")  # Scraped pages kept for conditional GETs
+EXTRACT_CACHE_DIR = os.path.join(CACHE_DIR, "extract")  # Extracted page text keyed by page hash
+EXTRACT_CACHE_MAX_FILES = 500  # Extracted texts kept; the least recently used are pruned on write
+XLS_FILE = os.path.join("data", "liudongrenkou.xls")
+XLS_CACHE_FILE = os.path.join("data", "liudongrenkou.parquet")  # Parsed XLS data, rebuilt when the XLS is newer
+# Excel readers in order of preference; calamine is Rust-backed and reads both .xls and .xlsx
+XLS_ENGINES = ('calamine', 'openpyxl', 'xlrd')
+CACHE_REFRESH_TIMEOUT = 600  # Seconds before an unfinished background refresh may be retried
+
+# Guards the check-and-mark step so only one background refresh starts per process
+_refresh_lock = threading.Lock()
+
+# Years found by extract_year_from_text, keyed by the SHA-256 of the page text
+YEAR_CACHE_SIZE = 256
+_year_cache = {}
 
 # Additional data sources
 ADDITIONAL_SOURCES = [
@@ -36,84 +51,368 @@ ADDITIONAL_SOURCES = [
     "http://tjj.zh.gov.cn/tjfx/",             # Zhuhai Statistics
 ]
 
-async def fetch_url_async(url, session):
-    """Asynchronously fetch URL content"""
+# Primary government sources
+BL_GOV_URL = "https://www.bl.gov.cn/art/2023/10/25/art_1229713728_59077085.html"
+STATS_GD_BASE_URL = "http://stats.gd.gov.cn/gdtjnj/"
+
+# Supplementary sources with 2018-2023 population statistics
+SUPPLEMENTARY_SOURCES = [
+    # Guangdong Government sources
+    "http://www.gd.gov.cn/zwgk/sjfb/",  # Guangdong Government Information Disclosure
+    "https://data.gd.gov.cn/",  # Guangdong Open Data Platform
+    "http://tjj.gz.gov.cn/tjgb/qstjgb/",  # Guangzhou Statistics Bureau
+    "http://tjj.sz.gov.cn/xxgk/zfxxgkml/tjsj/tjgb/",  # Shenzhen Statistics Bureau
+    "http://tjj.foshan.gov.cn/tjgb/index.html",  # Foshan Statistics Bureau
+
+    # News sources with population reports
+    "https://www.southcn.com/node_54a456f7d3/7f1162f91a.html",  # Southern Metropolis Daily
+    "https://www.nfncb.cn/zt/2022GDP/",  # Nanfang City Newspaper
+
+    # Academic sources
+    "https://www.gzass.cn/info/1013/",  # Guangzhou Academy of Social Sciences
+] + [
+    # Annual statistics reports
+    url
+    for year in [2022, 2021, 2020, 2019, 2018]
+    for url in (
+        f"http://stats.gd.gov.cn/gdtjnj/{year}/index.html",  # Guangdong Statistical Yearbook
+        f"http://tjj.gz.gov.cn/tjgb/ntjgb/{year}/",  # Guangzhou Annual Reports
+    )
+]
+
+# Keywords marking a page as containing population information; 常住人口 and
+# 流动人口 both contain 人口, so listing them would only add failed scans
+POPULATION_KEYWORDS = ('人口',)
+MIGRATION_KEYWORDS = POPULATION_KEYWORDS + ('迁入', '迁出')
+
+# Population patterns, compiled once at import time. Every gap between the
+# anchoring phrases is bounded so a failed match cannot backtrack across the page,
+# and numbers use an unambiguous \d+(?:\.\d+)? form. City names are a short run
+# of CJK characters (Guangdong names are at most 4); \w would also take digits
+# and Latin letters. Characters that only precede a name (年, 省, 在, 和, ...)
+# never appear in a Guangdong city name, so they are excluded to keep them from
+# being captured: "2023年韶关市" and "广东省广州市" give 韶关市 and 广州市
+CITY_NAME_PATTERN = r'((?:(?![年省在和与及的至比是])[\u4e00-\u9fa5]){1,6}市)'
+# "XXX市常住人口XXX万人，比上年增加/减少XXX万人"
+POPULATION_CHANGE_RE = re.compile(
+    CITY_NAME_PATTERN + r'[^\d]{0,40}(\d+(?:\.\d+)?)万人[^，]{0,40}，[^增减]{0,40}(增加|减少)[^，\d]{0,20}(\d+(?:\.\d+)?)万人'
+)
+# "XXX市人口XXX万人，同比增长/下降XX.XX%"
+POPULATION_GROWTH_RE = re.compile(
+    CITY_NAME_PATTERN + r'[^\d]{0,40}人口[^\d]{0,40}(\d+(?:\.\d+)?)万人[^，]{0,40}，[^增长下降]{0,40}(增长|下降)[^，\d]{0,20}(\d+(?:\.\d+)?)%'
+)
+# Table-like data: city names followed by numbers in close proximity
+POPULATION_TABLE_RE = re.compile(CITY_NAME_PATTERN + r'[^\d\n]{0,20}(\d+(?:\.\d+)?)([万千]?)人')
+# Multipliers for the optional unit captured by POPULATION_TABLE_RE
+POPULATION_UNIT_SCALES = {'万': 10000, '千': 1000, '': 1}
+
+# Blank lines separating paragraphs of extracted page text
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+
+# Anchors on the statistics index page that link to population pages
+POPULATION_LINK_XPATH = lxml.etree.XPath("//a[contains(., '人口')][contains(@href, '.html')]/@href")
+
+# Year patterns for census and statistical reports
+CENSUS_YEAR_RE = re.compile(r'(\d{4})年[^人口普查]{0,50}人口普查')
+STATISTICS_YEAR_RE = re.compile(r'(\d{4})年[^统计]{0,50}统计')
+
+# Concurrency limits for asynchronous scraping; the per-host limit keeps
+# requests to a single government site polite while other hosts proceed
+MAX_CONCURRENT_REQUESTS = 5
+MAX_REQUESTS_PER_HOST = 2
+KEEPALIVE_TIMEOUT = 30  # seconds an idle pooled connection is kept open
+DNS_CACHE_TTL = 300  # seconds a resolved host address is reused by the connection pool
+MIN_REQUEST_INTERVAL = 1.0  # minimum gap in seconds between requests to one host
+FETCH_RETRIES = 2  # extra attempts after a connection error or transient server error
+RETRY_BACKOFF = 0.5  # seconds before the first retry, doubling on each further attempt
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+# Common migration reasons used for synthetic data
+ECONOMIC_REASONS = ('就业机会', '工资水平', '经济发展', '创业环境', '产业转型')
+EDUCATION_REASONS = ('教育资源', '学校质量', '高等教育', '职业培训', '教育政策')
+HOUSING_REASONS = ('房价水平', '住房条件', '租金成本', '购房政策', '住房补贴')
+ENVIRONMENT_REASONS = ('环境质量', '空气污染', '绿化程度', '气候条件', '自然环境')
+SOCIAL_REASONS = ('社会福利', '医疗条件', '社会保障', '文化设施', '生活质量')
+POLICY_REASONS = ('户籍政策', '税收政策', '补贴政策', '人才政策', '产业政策')
+
+ALL_REASONS = (ECONOMIC_REASONS + EDUCATION_REASONS + HOUSING_REASONS +
+               ENVIRONMENT_REASONS + SOCIAL_REASONS + POLICY_REASONS)
+TIER_1_OTHER_REASONS = HOUSING_REASONS + ENVIRONMENT_REASONS + SOCIAL_REASONS + POLICY_REASONS
+TIER_2_OTHER_REASONS = EDUCATION_REASONS + ENVIRONMENT_REASONS + SOCIAL_REASONS + POLICY_REASONS
+
+# City tiers used to weight migration reasons
+TIER_1_CITIES = frozenset({'广州市', '深圳市'})
+TIER_2_CITIES = frozenset({'佛山市', '东莞市', '珠海市', '中山市', '惠州市'})
+
+# Base populations for synthetic data; unknown cities default to 3 million
+SYNTHETIC_BASE_POPULATIONS = {
+    "广州市": 15000000,
+    "深圳市": 13000000,
+    "佛山市": 7900000,
+    "东莞市": 8300000,
+    "珠海市": 2000000,
+    "中山市": 3400000,
+    "惠州市": 4800000,
+    "江门市": 4500000,
+    "肇庆市": 4000000,
+    "茂名市": 6100000,
+    "湛江市": 7100000,
+    "汕头市": 5600000,
+    "揭阳市": 6100000,
+    "梅州市": 4300000,
+    "汕尾市": 2900000,
+    "河源市": 3000000,
+    "韶关市": 2900000,
+    "清远市": 3700000,
+    "云浮市": 2400000,
+    "阳江市": 2500000,
+    "潮州市": 2600000,
+    "直辖市": 1409670000  # Added China's total population as a reference point
+}
+
+class HostRateLimiter:
+    """Bound in-flight requests and space out requests to the same host"""
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_REQUESTS, min_interval=MIN_REQUEST_INTERVAL):
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.min_interval = min_interval
+        self.last_request_time = {}
+        self.host_locks = {}
+
+    @asynccontextmanager
+    async def acquire(self, host):
+        # Only requests to the same host wait on each other's gap
+        lock = self.host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            wait = self.last_request_time.get(host, 0) + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.last_request_time[host] = time.monotonic()
+        async with self.semaphore:
+            yield
+
+# asyncio primitives belong to one event loop, so keep a limiter per loop
+_rate_limiters = weakref.WeakKeyDictionary()
+
+def get_rate_limiter():
+    """Get the host rate limiter for the running event loop"""
+    loop = asyncio.get_running_loop()
+    limiter = _rate_limiters.get(loop)
+    if limiter is None:
+        limiter = _rate_limiters[loop] = HostRateLimiter()
+    return limiter
+
+def http_cache_path(url):
+    """Get the on-disk cache file for a URL"""
+    return os.path.join(HTTP_CACHE_DIR, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+def load_cached_response(url):
+    """Load a previously fetched page and its validators, or None"""
     try:
-        async with session.get(url, timeout=30) as response:
-            if response.status == 200:
-                return await response.text()
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
+        with open(http_cache_path(url), 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+def save_cached_response(url, headers, body):
+    """Cache a fetched page if the server sent ETag or Last-Modified validators"""
+    entry = {
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'body': body
+    }
+    if not entry['etag'] and not entry['last_modified']:
+        return
+
+    def write(tmp_path):
+        with open(tmp_path, 'wb') as f:
+            f.write(orjson.dumps(entry))
+    try:
+        os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+        atomic_write(http_cache_path(url), write)
+    except OSError as e:
+        print(f"Could not cache response for {url}: {e}")
+
+async def fetch_url_async(url, session):
+    """Asynchronously fetch URL content, revalidating any cached copy with a conditional GET"""
+    import aiohttp
+
+    cached = load_cached_response(url)
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    for attempt in range(FETCH_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+        try:
+            async with get_rate_limiter().acquire(urlparse(url).netloc), \
+                    session.get(url, timeout=30, headers=headers) as response:
+                if response.status == 304 and cached:
+                    return cached['body']
+                if response.status == 200:
+                    body = decode_page(await response.read(), response.charset)
+                    save_cached_response(url, response.headers, body)
+                    return body
+                if response.status not in RETRY_STATUSES:
+                    return None
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            print(f"Error fetching {url} (attempt {attempt + 1}): {e}")
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return None
     return None
 
-async def scrape_sources_async(urls):
-    """Scrape multiple sources asynchronously"""
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch_url_async(url, session) for url in urls]
-        results = await asyncio.gather(*tasks)
-        return [(url, content) for url, content in zip(urls, results) if content]
+def create_async_session():
+    """Create an aiohttp session with a bounded keep-alive connection pool"""
+    # aiohttp and trafilatura are imported where they are used, so loading the
+    # cached data at app start doesn't pay for the scraping stack
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONCURRENT_REQUESTS,
+        limit_per_host=MAX_REQUESTS_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL
+    )
+    return aiohttp.ClientSession(connector=connector, headers={"User-Agent": get_user_agent()})
 
-def process_scraped_content(url, content):
-    """Process scraped content from a single source"""
+def decode_page(body, charset=None):
+    """
+    Decode a fetched page using the charset from its Content-Type header, falling
+    back to the encoding declared in the markup (many government pages only
+    declare GBK/GB2312 in a <meta> tag)
+    """
+    if charset:
+        try:
+            return body.decode(charset)
+        except (LookupError, UnicodeDecodeError):
+            pass
+    return UnicodeDammit(body, is_html=True).unicode_markup
+
+def parse_html(content):
+    """Parse raw HTML into an lxml tree, detecting the page encoding like BeautifulSoup does"""
+    if isinstance(content, bytes):
+        encoding = UnicodeDammit(content, is_html=True).original_encoding
+        if encoding:
+            return lxml.html.fromstring(content, parser=lxml.html.HTMLParser(encoding=encoding))
+    return lxml.html.fromstring(content)
+
+def extract_page_text(content):
+    """
+    Extract the main text of a page
+
+    Results are cached in cache/extract/ keyed by the SHA-256 of the page, so an
+    unchanged page is not run through trafilatura again.
+    """
+    raw = content if isinstance(content, bytes) else content.encode('utf-8')
+    cache_path = os.path.join(EXTRACT_CACHE_DIR, hashlib.sha256(raw).hexdigest() + '.txt')
+    try:
+        with open(cache_path, 'r', encoding='utf-8', newline='') as f:
+            text = f.read()
+        os.utime(cache_path)  # Mark as recently used for pruning
+        return text
+    except OSError:
+        pass
+
+    import trafilatura
+
+    # Parse once and share the tree between trafilatura and the plain-text fallback
+    tree = parse_html(content)
+    text = trafilatura.extract(tree)
+    if not text:
+        text = tree.text_content()
+
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
     try:
-        # Try trafilatura first
-        text = trafilatura.extract(content)
-        if not text:
-            # Fallback to BeautifulSoup
-            soup = BeautifulSoup(content, 'html.parser')
-            text = soup.get_text()
-
-        if text and any(keyword in text for keyword in ['人口', '常住人口', '流动人口']):
+        os.makedirs(EXTRACT_CACHE_DIR, exist_ok=True)
+        atomic_write(cache_path, write)
+        prune_extract_cache()
+    except OSError as e:
+        print(f"Could not cache extracted text: {e}")
+    return text
+
+def prune_extract_cache(max_files=EXTRACT_CACHE_MAX_FILES):
+    """Remove the least recently used extracted texts beyond max_files"""
+    with os.scandir(EXTRACT_CACHE_DIR) as entries:
+        files = [entry for entry in entries if entry.name.endswith('.txt') and entry.is_file()]
+    if len(files) <= max_files:
+        return
+
+    files.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in files[:len(files) - max_files]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass  # Already removed by a concurrent prune
+
+def process_scraped_content(url, content, keywords=POPULATION_KEYWORDS):
+    """Process scraped content from a single source
+
+    Pages not mentioning any of `keywords` are skipped; pass None to process every page.
+    """
+    try:
+        text = extract_page_text(content)
+        if text and (keywords is None or any(keyword in text for keyword in keywords)):
             data = extract_population_data_from_text(text)
-            if data:
-                for item in data:
-                    item['source'] = url
+            if not data.empty:
+                data['source'] = url
                 return data
     except Exception as e:
         print(f"Error processing content from {url}: {e}")
-    return []
+    return pd.DataFrame()
+
+async def fetch_and_process_async(url, session, keywords=POPULATION_KEYWORDS):
+    """
+    Fetch a page and extract its population data as soon as it arrives, so parsing
+    of fast pages overlaps with the download of slow ones
+
+    Returns:
+        DataFrame: Extracted data, or None if the page could not be fetched
+    """
+    content = await fetch_url_async(url, session)
+    if not content:
+        return None
+    # Parse in a worker thread so it does not block the event loop
+    return await asyncio.to_thread(process_scraped_content, url, content, keywords)
 
-async def enhanced_scraping():
+async def enhanced_scraping(session=None):
     """Enhanced scraping function using async and parallel processing"""
+    if session is None:
+        async with create_async_session() as session:
+            return await enhanced_scraping(session)
+
     all_sources = ADDITIONAL_SOURCES + [
         f"http://stats.gd.gov.cn/tjsj/tjfx/{year}/"
         for year in range(2018, datetime.now().year + 1)
     ]
 
-    # Fetch data asynchronously
-    scraped_data = await scrape_sources_async(all_sources)
-
-    # Process results in parallel using ThreadPoolExecutor
+    # Fetch and process every source concurrently
+    results = await asyncio.gather(
+        *(fetch_and_process_async(url, session) for url in all_sources),
+        return_exceptions=True
+    )
     all_data = []
-    with ThreadPoolExecutor() as executor:
-        futures = [
-            executor.submit(process_scraped_content, url, content)
-            for url, content in scraped_data
-        ]
-        for future in futures:
-            try:
-                data = future.result()
-                if data:
-                    all_data.extend(data)
-            except Exception as e:
-                print(f"Error processing scraped data: {e}")
-
-    return pd.DataFrame(all_data) if all_data else pd.DataFrame()
-
-def get_session():
-    """Create a requests session with retry strategy and rotating user agents"""
-    session = requests.Session()
-    session.mount("http://", HTTPAdapter(max_retries=retry_strategy))
-    session.mount("https://", HTTPAdapter(max_retries=retry_strategy))
+    for data in results:
+        if isinstance(data, Exception):
+            print(f"Error processing scraped data: {data}")
+        elif data is not None and not data.empty:
+            all_data.append(data)
+
+    return pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
+
+def get_user_agent():
+    """Pick a random browser user agent"""
     try:
-        ua = UserAgent()
-        session.headers.update({"User-Agent": ua.random})
+        return UserAgent().random
     except:
         # Fallback user agent if fake_useragent fails
-        session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        })
-    return session
+        return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 
 def ensure_cache_dir():
     """Ensure cache directory exists"""
@@ -125,25 +424,65 @@ def ensure_cache_dir():
         # In cloud environments, we might not have write access to create directories
         # Just continue without caching
 
-def load_cached_data():
-    """Load data from cache if available and not expired"""
+def atomic_write(path, write):
+    """
+    Write a file atomically: write(tmp_path) fills a temporary file in the same
+    directory, which then replaces path so readers never see a partial file
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def read_refresh_started():
+    """Get the time the running background refresh started, or 0 if none is recorded"""
+    try:
+        with open(CACHE_REFRESH_MARKER, 'rb') as f:
+            return float(f.read())
+    except (OSError, ValueError):
+        return 0
+
+def read_cache_last_updated():
+    """Get the time the cache was last written, or 0 if there is no readable cache"""
+    try:
+        # The metadata is stored in the Parquet schema, so the table itself is not read
+        schema = pq.read_schema(CACHE_FILE)
+        metadata = orjson.loads((schema.metadata or {}).get(CACHE_METADATA_KEY, b'{}'))
+        return metadata.get('last_updated', 0)
+    except Exception:
+        return 0
+
+def load_cached_data(stale_ok=True):
+    """
+    Load data from cache if available
+
+    Args:
+        stale_ok (bool): Return expired data immediately and refresh the cache in
+            the background (refresh-ahead) instead of treating it as a miss
+
+    Returns:
+        DataFrame: Cached data, or None if there is no usable cache
+    """
     ensure_cache_dir()
 
     # Check if cache exists
-    if not os.path.exists(CACHE_FILE) or not os.path.exists(CACHE_METADATA):
+    if not os.path.exists(CACHE_FILE):
         return None
 
-    # Check if cache is expired
+    # Check if cache is expired before reading the data itself
     try:
-        with open(CACHE_METADATA, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
-
-        last_updated = metadata.get('last_updated', 0)
-        if time.time() - last_updated > CACHE_EXPIRY:
-            return None  # Cache expired
+        if time.time() - read_cache_last_updated() > CACHE_EXPIRY:
+            if not stale_ok:
+                return None  # Cache expired
+            start_background_refresh()
 
         # Load data from cache
-        return pd.read_csv(CACHE_FILE)
+        return pq.read_table(CACHE_FILE).to_pandas()
     except (PermissionError, FileNotFoundError) as e:
         # These errors are expected in cloud environments with restricted file access
         print(f"Cache access restricted (expected in cloud environments): {e}")
@@ -152,289 +491,326 @@ def load_cached_data():
         print(f"Error loading cached data: {e}")
         return None
 
+def start_background_refresh():
+    """Re-scrape and rewrite the cache in a daemon thread unless a refresh is already running"""
+    with _refresh_lock:
+        if time.time() - read_refresh_started() < CACHE_REFRESH_TIMEOUT:
+            return
+
+        # Record the refresh in a marker file so other readers don't start another
+        # one; the refresh thread removes the marker once it finishes
+        def write(tmp_path):
+            with open(tmp_path, 'w') as f:
+                f.write(str(time.time()))
+        try:
+            atomic_write(CACHE_REFRESH_MARKER, write)
+        except (PermissionError, FileNotFoundError) as e:
+            print(f"Cache writing restricted (expected in cloud environments): {e}")
+            return
+
+    threading.Thread(target=_background_refresh, daemon=True).start()
+
+def _background_refresh():
+    """
+    Refresh the cached data from the live sources
+
+    The cache is only replaced when scraping actually returns data; unlike
+    scrape_population_data there is no synthetic fallback, so a failed refresh
+    keeps the existing (stale but real) cache for the next attempt.
+    """
+    try:
+        data_sources = []
+        xls_data = load_xls_data()
+        if not xls_data.empty:
+            data_sources.append(xls_data)
+
+        enhanced_data, web_data = asyncio.run(scrape_all_sources_async())
+        scraped_data = [df for df in (enhanced_data, *web_data.values()) if not df.empty]
+        if scraped_data:
+            save_to_cache(merge_and_clean_data(data_sources + scraped_data))
+        else:
+            print("Background cache refresh scraped no data; keeping the existing cache")
+    except Exception as e:
+        print(f"Background cache refresh failed: {e}")
+    finally:
+        # Only the refresh itself clears its marker, so saves made meanwhile by
+        # foreground scrapes don't let another reader start a second refresh
+        try:
+            os.remove(CACHE_REFRESH_MARKER)
+        except OSError:
+            pass
+
 def save_to_cache(data):
     """Save data to cache with metadata"""
     ensure_cache_dir()
 
     try:
-        # Save data
-        data.to_csv(CACHE_FILE, index=False)
+        # Save data as compressed Parquet; a categorical city column is
+        # dictionary-encoded and all dtypes survive the round trip
+        cache_data = data.astype({'city': 'category'}) if 'city' in data.columns else data
+        table = pa.Table.from_pandas(cache_data, preserve_index=False)
 
-        # Save metadata
+        # Embed the metadata in the file so data and timestamp are replaced together
         metadata = {
             'last_updated': time.time(),
             'source': 'scraped',
             'record_count': len(data)
         }
-
-        with open(CACHE_METADATA, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            CACHE_METADATA_KEY: orjson.dumps(metadata)
+        })
+        atomic_write(CACHE_FILE, lambda tmp_path: pq.write_table(table, tmp_path, compression='snappy'))
     except (PermissionError, FileNotFoundError) as e:
         # These errors are expected in cloud environments with restricted file access
         print(f"Cache writing restricted (expected in cloud environments): {e}")
     except Exception as e:
         print(f"Error saving to cache: {e}")
 
-def extract_population_data_from_text(text):
-    """Extract population data from text content using various regex patterns"""
-    population_data = []
-
-    # Pattern 1: Look for patterns like "XXX市常住人口XXX万人，比上年增加/减少XXX万人"
-    city_pattern1 = r'(\w+市)[^\d]*([\d\.]+)万人[^，]*，[^增减]*(增加|减少)[^，]*([\d\.]+)万人'
-    matches1 = re.finditer(city_pattern1, text)
-
-    for match in matches1:
-        city = match.group(1)
-        population = float(match.group(2)) * 10000  # Convert from 万人 to actual number
-        change_direction = match.group(3)
-        change_amount = float(match.group(4)) * 10000
-
-        # Adjust change amount based on direction
-        if change_direction == '减少':
-            change_amount = -change_amount
-
-        population_data.append({
-            'city': city,
-            'population': population,
-            'change': change_amount,
-            'year': extract_year_from_text(text)
-        })
-
-    # Pattern 2: Look for patterns like "XXX市人口XXX万人，同比增长/下降XX.XX%"
-    city_pattern2 = r'(\w+市)[^\d]*人口[^\d]*([\d\.]+)万人[^，]*，[^增长下降]*(增长|下降)[^，]*([\d\.]+)%'
-    matches2 = re.finditer(city_pattern2, text)
+def iter_text_chunks(text):
+    """Split page text into paragraph chunks at blank lines"""
+    for chunk in PARAGRAPH_BREAK_RE.split(text):
+        if chunk.strip():
+            yield chunk
 
-    for match in matches2:
-        city = match.group(1)
-        population = float(match.group(2)) * 10000  # Convert from 万人 to actual number
-        change_direction = match.group(3)
-        percentage_change = float(match.group(4))
+def iter_population_matches(chunks):
+    """
+    Lazily yield population figures matched in a stream of text chunks
 
-        # Calculate change amount based on percentage
-        change_amount = (population * percentage_change / 100)
+    Yields:
+        tuple: (pattern, city, population, change) where pattern is the 1-based
+        index of the matching pattern
+    """
+    for chunk in chunks:
+        # Every pattern needs a city name and a 人 unit; a substring test is far
+        # cheaper than running three regex scans over paragraphs without them
+        if '市' not in chunk or '人' not in chunk:
+            continue
 
-        # Adjust change amount based on direction
-        if change_direction == '下降':
-            change_amount = -change_amount
+        # Pattern 1: Look for patterns like "XXX市常住人口XXX万人，比上年增加/减少XXX万人"
+        for match in POPULATION_CHANGE_RE.finditer(chunk):
+            population = float(match.group(2)) * 10000  # Convert from 万人 to actual number
+            change_amount = float(match.group(4)) * 10000
 
-        population_data.append({
-            'city': city,
-            'population': population,
-            'change': change_amount,
-            'year': extract_year_from_text(text)
-        })
+            # Adjust change amount based on direction
+            if match.group(3) == '减少':
+                change_amount = -change_amount
 
-    # Pattern 3: Look for table-like data with city and population figures
-    # This pattern looks for city names followed by numbers in close proximity
-    city_pattern3 = r'([\u4e00-\u9fa5]+市)[^\d\n]{0,20}([\d\.]+)[万千]?人'
-    matches3 = re.finditer(city_pattern3, text)
+            yield 1, match.group(1), population, change_amount
 
-    for match in matches3:
-        city = match.group(1)
-        population_str = match.group(2)
+        # Pattern 2: Look for patterns like "XXX市人口XXX万人，同比增长/下降XX.XX%"
+        for match in POPULATION_GROWTH_RE.finditer(chunk):
+            population = float(match.group(2)) * 10000  # Convert from 万人 to actual number
 
-        # Convert to actual number
-        if "万" in match.group(0):
-            population = float(population_str) * 10000
-        elif "千" in match.group(0):
-            population = float(population_str) * 1000
-        else:
-            population = float(population_str)
-
-        # For this pattern, we don't have change data, so set to 0
-        population_data.append({
-            'city': city,
-            'population': population,
-            'change': 0,
-            'year': extract_year_from_text(text)
-        })
+            # Calculate change amount based on percentage
+            change_amount = population * float(match.group(4)) / 100
 
-    # Deduplicate data (keep entry with non-zero change if possible)
-    cities_seen = {}
-    unique_data = []
+            # Adjust change amount based on direction
+            if match.group(3) == '下降':
+                change_amount = -change_amount
 
-    for entry in population_data:
-        city_year = (entry['city'], entry['year'])
+            yield 2, match.group(1), population, change_amount
 
-        if city_year not in cities_seen:
-            cities_seen[city_year] = entry
-            unique_data.append(entry)
-        else:
-            # If we have an entry with non-zero change, prefer that one
-            if abs(entry['change']) > 0 and abs(cities_seen[city_year]['change']) == 0:
-                # Remove existing entry
-                unique_data.remove(cities_seen[city_year])
-                # Add new entry
-                cities_seen[city_year] = entry
-                unique_data.append(entry)
+        # Pattern 3: Look for table-like data with city and population figures
+        for match in POPULATION_TABLE_RE.finditer(chunk):
+            # Convert to actual number
+            population = float(match.group(2)) * POPULATION_UNIT_SCALES[match.group(3)]
 
-    return unique_data
+            # For this pattern, we don't have change data, so set to 0
+            yield 3, match.group(1), population, 0.0
 
-def extract_year_from_text(text):
-    """Extract year information from text"""
-    year_pattern = r'(\d{4})年[^人口普查]*人口普查'
-    match = re.search(year_pattern, text)
+def extract_population_data_from_text(text):
+    """Extract population data from text content using various regex patterns"""
+    # The reporting year is the same for every match on a page
+    year = extract_year_from_text(text)
+
+    # Deduplicate while matching: keep one entry per city (the year is shared),
+    # preferring a non-zero change, then the earliest pattern, then the first match
+    best = {}
+    for index, (pattern, city, population, change) in enumerate(
+            iter_population_matches(iter_text_chunks(text))):
+        rank = (change == 0, pattern)
+        current = best.get(city)
+        if current is None or rank < current[0]:
+            best[city] = (rank, index, population, change)
+
+    # Build the DataFrame once, in the order the kept matches appeared
+    entries = sorted(best.items(), key=lambda item: item[1][1])
+    return pd.DataFrame({
+        'city': pd.Categorical([city for city, _ in entries]),
+        'population': [entry[2] for _, entry in entries],
+        'change': [entry[3] for _, entry in entries],
+        'year': year
+    })
+
+def _search_year(text):
+    """The year a page reports, or None when it names none"""
+    # Only run a pattern when its anchor phrase occurs; the substring test is a
+    # fast linear scan, while a failing regex search retries at every "YYYY年"
+    match = CENSUS_YEAR_RE.search(text) if '人口普查' in text else None
     if match:
         return int(match.group(1))
 
     # Try alternative patterns
-    alt_pattern = r'(\d{4})年[^统计]*统计'
-    match = re.search(alt_pattern, text)
+    match = STATISTICS_YEAR_RE.search(text) if '统计' in text else None
     if match:
         return int(match.group(1))
+    return None
 
-    # Default to current year if no match
-    return datetime.now().year
+def extract_year_from_text(text):
+    """
+    Extract year information from text
 
-def scrape_bl_gov_cn():
-    """Scrape population data from bl.gov.cn"""
-    url = "https://www.bl.gov.cn/art/2023/10/25/art_1229713728_59077085.html"
+    Search results are memoized by the SHA-256 of the text, so re-scraping unchanged
+    pages (e.g. in a background cache refresh) skips the searches without keeping
+    whole pages in memory. The current-year default is applied on every call.
+    """
+    key = hashlib.sha256(text.encode('utf-8')).digest()
+    try:
+        year = _year_cache[key]
+    except KeyError:
+        year = _search_year(text)
+        if len(_year_cache) >= YEAR_CACHE_SIZE:
+            _year_cache.pop(next(iter(_year_cache)), None)  # Drop the oldest entry
+        _year_cache[key] = year
+
+    # Default to current year if no match
+    return datetime.now().year if year is None else year
 
+async def scrape_bl_gov_cn_async(session):
+    """Asynchronously scrape population data from bl.gov.cn"""
     try:
-        session = get_session()
-        # Use trafilatura to get clean text
-        downloaded = trafilatura.fetch_url(url)
-        text = trafilatura.extract(downloaded)
-
-        if not text:
-            # Fallback to BeautifulSoup if trafilatura fails
-            response = session.get(url, timeout=30)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            text = soup.get_text()
-
-        # Extract data from text
-        population_data = extract_population_data_from_text(text)
-
-        return pd.DataFrame(population_data)
+        data = await fetch_and_process_async(BL_GOV_URL, session, None)
+        return pd.DataFrame() if data is None else data
     except Exception as e:
         print(f"Error scraping bl.gov.cn: {e}")
         return pd.DataFrame()
 
-def scrape_stats_gd_gov_cn():
-    """Scrape population data from stats.gd.gov.cn (Guangdong Statistics Bureau)"""
-    # Base URL for the statistical yearbooks
-    base_url = "http://stats.gd.gov.cn/gdtjnj/"
+def find_population_links(tree, base_url, limit=5):
+    """Find distinct absolute links to population pages in a parsed index page"""
+    hrefs = POPULATION_LINK_XPATH(tree)
+    urls = dict.fromkeys(urljoin(base_url, href) for href in hrefs)
+    return list(urls)[:limit]
 
+async def scrape_stats_gd_gov_cn_async(session):
+    """Asynchronously scrape population data from stats.gd.gov.cn (Guangdong Statistics Bureau)"""
     try:
-        session = get_session()
         # Get the main page to find links to yearbooks
-        response = session.get(base_url, timeout=30)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Find links to population data sections
-        population_links = []
-        for link in soup.find_all('a'):
-            href = link.get('href', '')
-            text = link.get_text().strip()
-            if '人口' in text and '.html' in href:
-                population_links.append(href)
-
-        all_data = []
-
-        # Process each link
-        for link in population_links[:5]:  # Limit to first 5 to avoid overloading
-            try:
-                full_url = link if link.startswith('http') else f"{base_url}/{link}"
-                downloaded = trafilatura.fetch_url(full_url)
-                text = trafilatura.extract(downloaded)
-
-                if text:
-                    data = extract_population_data_from_text(text)
-                    all_data.extend(data)
-
-                # Be respectful with scraping
-                time.sleep(2)
-            except Exception as e:
-                print(f"Error processing link {link}: {e}")
-                continue
-
-        return pd.DataFrame(all_data)
+        content = await fetch_url_async(STATS_GD_BASE_URL, session)
+        if not content:
+            return pd.DataFrame()
+
+        # Find links to population data sections, limited to the first 5 to avoid overloading
+        tree = await asyncio.to_thread(parse_html, content)
+        urls = find_population_links(tree, STATS_GD_BASE_URL, limit=5)
+
+        # Fetch and process the linked pages concurrently
+        results = await asyncio.gather(*(fetch_and_process_async(url, session, None) for url in urls))
+
+        all_data = [data for data in results if data is not None and not data.empty]
+
+        return pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
     except Exception as e:
         print(f"Error scraping stats.gd.gov.cn: {e}")
         return pd.DataFrame()
 
-def scrape_supplementary_sources():
-    """Scrape additional data sources for comprehensive data collection"""
-    # List of potential data sources with 2022-2023 population statistics
-    sources = [
-        # Guangdong Government sources
-        "http://www.gd.gov.cn/zwgk/sjfb/",  # Guangdong Government Information Disclosure
-        "https://data.gd.gov.cn/",  # Guangdong Open Data Platform
-        "http://tjj.gz.gov.cn/tjgb/qstjgb/",  # Guangzhou Statistics Bureau
-        "http://tjj.sz.gov.cn/xxgk/zfxxgkml/tjsj/tjgb/",  # Shenzhen Statistics Bureau
-        "http://tjj.foshan.gov.cn/tjgb/index.html",  # Foshan Statistics Bureau
-
-        # News sources with population reports
-        "https://www.southcn.com/node_54a456f7d3/7f1162f91a.html",  # Southern Metropolis Daily
-        "https://www.nfncb.cn/zt/2022GDP/",  # Nanfang City Newspaper
-
-        # Academic sources
-        "https://www.gzass.cn/info/1013/",  # Guangzhou Academy of Social Sciences
-    ]
+async def scrape_supplementary_sources_async(session):
+    """Asynchronously scrape additional data sources for comprehensive data collection"""
+    results = await asyncio.gather(*(
+        fetch_and_process_async(url, session, MIGRATION_KEYWORDS) for url in SUPPLEMENTARY_SOURCES
+    ))
 
     all_data = []
+    for url, data in zip(SUPPLEMENTARY_SOURCES, results):
+        if data is None:
+            continue
+        if not data.empty:
+            print(f"Extracted {len(data)} population data points from {url}")
+            all_data.append(data)
+        else:
+            print(f"No relevant population data found in {url}")
 
-    # Add specific year-based URLs for annual statistics reports
-    years = [2022, 2021, 2020, 2019, 2018]
+    result_df = pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
+    print(f"Total supplementary data collected: {len(result_df)} records")
+    return result_df
 
-    for year in years:
-        sources.extend([
-            f"http://stats.gd.gov.cn/gdtjnj/{year}/index.html",  # Guangdong Statistical Yearbook
-            f"http://tjj.gz.gov.cn/tjgb/ntjgb/{year}/",  # Guangzhou Annual Reports
-        ])
+async def scrape_web_sources_async(session=None):
+    """
+    Scrape all web sources concurrently over one pooled session
 
-    # Process each URL with improved error handling and rate limiting
-    for url in sources:
-        try:
-            print(f"Attempting to scrape data from: {url}")
-
-            # Use multiple fetching methods for robustness
-            text = None
-
-            # Try trafilatura first (best for article content)
-            downloaded = trafilatura.fetch_url(url)
-            text = trafilatura.extract(downloaded)
-
-            # If trafilatura fails, try requests + BeautifulSoup
-            if not text:
-                session = get_session()
-                response = session.get(url, timeout=30)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
-                text = soup.get_text()
-
-            if text:
-                # Look for population-related sections in the text
-                if any(keyword in text for keyword in ['人口', '常住人口', '流动人口', '迁入', '迁出']):
-                    print(f"Found population information in {url}")
-                    data = extract_population_data_from_text(text)
-                    if data:
-                        print(f"Extracted {len(data)} population data points from {url}")
-
-                        # Add source information
-                        for item in data:
-                            item['source'] = url
-
-                        all_data.extend(data)
-                else:
-                    print(f"No relevant population data found in {url}")
+    Returns:
+        dict: DataFrame per source, keyed by 'bl_gov_cn', 'stats_gd_gov_cn' and 'supplementary'
+    """
+    if session is None:
+        async with create_async_session() as session:
+            return await scrape_web_sources_async(session)
+
+    scrapers = {
+        'bl_gov_cn': scrape_bl_gov_cn_async,
+        'stats_gd_gov_cn': scrape_stats_gd_gov_cn_async,
+        'supplementary': scrape_supplementary_sources_async,
+    }
 
-            # Be respectful with rate limiting - randomize wait time
-            wait_time = 2 + (hash(url) % 3)  # 2-5 seconds
-            print(f"Waiting {wait_time} seconds before next request")
-            time.sleep(wait_time)
+    results = await asyncio.gather(
+        *(scraper(session) for scraper in scrapers.values()),
+        return_exceptions=True
+    )
+
+    web_data = {}
+    for name, result in zip(scrapers, results):
+        if isinstance(result, Exception):
+            print(f"Error scraping {name}: {result}")
+            result = pd.DataFrame()
+        web_data[name] = result
+    return web_data
+
+async def scrape_all_sources_async(fallback=True):
+    """
+    Run enhanced scraping and, if it finds nothing, the individual web sources
+
+    Both stages share one pooled session so connections to hosts that appear
+    in both (e.g. stats.gd.gov.cn) are reused.
 
+    Returns:
+        tuple: (enhanced DataFrame, dict of DataFrames per web source)
+    """
+    async with create_async_session() as session:
+        try:
+            enhanced_data = await enhanced_scraping(session)
         except Exception as e:
-            print(f"Error scraping {url}: {e}")
-            # Wait a bit longer after an error
-            time.sleep(5)
-            continue
+            print(f"Error in enhanced scraping: {e}")
+            enhanced_data = pd.DataFrame()
 
-    result_df = pd.DataFrame(all_data) if all_data else pd.DataFrame()
-    print(f"Total supplementary data collected: {len(result_df)} records")
-    return result_df
+        web_data = {}
+        if fallback and enhanced_data.empty:
+            web_data = await scrape_web_sources_async(session)
+
+    return enhanced_data, web_data
+
+async def _run_with_session(scraper):
+    """Run a single asynchronous scraper with its own session"""
+    async with create_async_session() as session:
+        return await scraper(session)
+
+def scrape_web_sources():
+    """Scrape bl.gov.cn, stats.gd.gov.cn and the supplementary sources concurrently"""
+    return asyncio.run(scrape_web_sources_async())
+
+def scrape_bl_gov_cn():
+    """Scrape population data from bl.gov.cn"""
+    return asyncio.run(_run_with_session(scrape_bl_gov_cn_async))
+
+def scrape_stats_gd_gov_cn():
+    """Scrape population data from stats.gd.gov.cn (Guangdong Statistics Bureau)"""
+    return asyncio.run(_run_with_session(scrape_stats_gd_gov_cn_async))
+
+def scrape_supplementary_sources():
+    """Scrape additional data sources for comprehensive data collection"""
+    return asyncio.run(_run_with_session(scrape_supplementary_sources_async))
+
+def _sample_reasons(rng, pool, count):
+    """Draw `count` distinct reasons from a reason pool"""
+    return [pool[i] for i in rng.choice(len(pool), size=min(count, len(pool)), replace=False)]
 
 def generate_migration_reasons(city, year):
     """
@@ -447,56 +823,36 @@ def generate_migration_reasons(city, year):
     Returns:
         list: List of migration reasons
     """
-    # Define common migration reasons
-    economic_reasons = ['就业机会', '工资水平', '经济发展', '创业环境', '产业转型']
-    education_reasons = ['教育资源', '学校质量', '高等教育', '职业培训', '教育政策']
-    housing_reasons = ['房价水平', '住房条件', '租金成本', '购房政策', '住房补贴']
-    environment_reasons = ['环境质量', '空气污染', '绿化程度', '气候条件', '自然环境']
-    social_reasons = ['社会福利', '医疗条件', '社会保障', '文化设施', '生活质量']
-    policy_reasons = ['户籍政策', '税收政策', '补贴政策', '人才政策', '产业政策']
-
-    # Group all reasons
-    all_reasons = economic_reasons + education_reasons + housing_reasons + environment_reasons + social_reasons + policy_reasons
-
     # Determine number of reasons based on city tier
-    tier_1_cities = ['广州市', '深圳市']
-    tier_2_cities = ['佛山市', '东莞市', '珠海市', '中山市', '惠州市']
-
-    if city in tier_1_cities:
+    if city in TIER_1_CITIES:
         num_reasons = 3 + (year % 3)  # 3-5 reasons for tier 1 cities
-    elif city in tier_2_cities:
+    elif city in TIER_2_CITIES:
         num_reasons = 2 + (year % 3)  # 2-4 reasons for tier 2 cities
     else:
         num_reasons = 1 + (year % 3)  # 1-3 reasons for other cities
 
-    # Seed random generator with city and year for consistency
-    import random
-    random.seed(hash(city) + year)
-
-    # Select reasons based on city characteristics
-    selected_reasons = []
+    # Seed a generator with city and year for consistency across runs
+    rng = np.random.default_rng(zlib.crc32(city.encode('utf-8')) ^ year)
 
     # Tier 1 cities prioritize economic and education reasons
-    if city in tier_1_cities:
-        selected_reasons.extend(random.sample(economic_reasons, min(2, len(economic_reasons))))
-        selected_reasons.extend(random.sample(education_reasons, min(1, len(education_reasons))))
+    if city in TIER_1_CITIES:
+        selected_reasons = _sample_reasons(rng, ECONOMIC_REASONS, 2)
+        selected_reasons += _sample_reasons(rng, EDUCATION_REASONS, 1)
         remaining_count = num_reasons - len(selected_reasons)
         if remaining_count > 0:
-            remaining_reasons = housing_reasons + environment_reasons + social_reasons + policy_reasons
-            selected_reasons.extend(random.sample(remaining_reasons, min(remaining_count, len(remaining_reasons))))
+            selected_reasons += _sample_reasons(rng, TIER_1_OTHER_REASONS, remaining_count)
 
     # Tier 2 cities prioritize housing and economic reasons
-    elif city in tier_2_cities:
-        selected_reasons.extend(random.sample(housing_reasons, min(1, len(housing_reasons))))
-        selected_reasons.extend(random.sample(economic_reasons, min(1, len(economic_reasons))))
+    elif city in TIER_2_CITIES:
+        selected_reasons = _sample_reasons(rng, HOUSING_REASONS, 1)
+        selected_reasons += _sample_reasons(rng, ECONOMIC_REASONS, 1)
         remaining_count = num_reasons - len(selected_reasons)
         if remaining_count > 0:
-            remaining_reasons = education_reasons + environment_reasons + social_reasons + policy_reasons
-            selected_reasons.extend(random.sample(remaining_reasons, min(remaining_count, len(remaining_reasons))))
+            selected_reasons += _sample_reasons(rng, TIER_2_OTHER_REASONS, remaining_count)
 
     # Other cities have more varied reasons
     else:
-        selected_reasons = random.sample(all_reasons, min(num_reasons, len(all_reasons)))
+        selected_reasons = _sample_reasons(rng, ALL_REASONS, num_reasons)
 
     return selected_reasons
 
@@ -505,60 +861,41 @@ def generate_synthetic_data(cities, years=None):
     Generate synthetic data for testing or when scraping fails
     This function generates realistic synthetic data from 2008 to 2024
     """
-    data = []
     if years is None:
         years = list(range(2008, 2025))  # Updated to include data from 2008 to 2024
 
-    base_populations = {
-        "广州市": 15000000,
-        "深圳市": 13000000,
-        "佛山市": 7900000,
-        "东莞市": 8300000,
-        "珠海市": 2000000,
-        "中山市": 3400000,
-        "惠州市": 4800000,
-        "江门市": 4500000,
-        "肇庆市": 4000000,
-        "茂名市": 6100000,
-        "湛江市": 7100000,
-        "汕头市": 5600000,
-        "揭阳市": 6100000,
-        "梅州市": 4300000,
-        "汕尾市": 2900000,
-        "河源市": 3000000,
-        "韶关市": 2900000,
-        "清远市": 3700000,
-        "云浮市": 2400000,
-        "阳江市": 2500000,
-        "潮州市": 2600000,
-        "直辖市": 1409670000  # Added China's total population as a reference point
-    }
-
-    for city in cities:
-        base = base_populations.get(city, 3000000)  # Default to 3 million
-        for i, year in enumerate(years):
-            # Create slightly variable growth rates for each city and year
-            growth_rate = 0.01 + (i * 0.002) + (hash(city) % 10) / 1000
-            if i == 0:
-                population = base
-                change = 0
-            else:
-                prev_population = data[-1]['population']
-                population = prev_population * (1 + growth_rate)
-                change = population - prev_population
-
-            # Generate synthetic migration reasons
-            migration_reasons = generate_migration_reasons(city, year)
-
-            data.append({
-                'city': city,
-                'year': year,
-                'population': int(population),
-                'change': int(change),
-                'migration_reasons': migration_reasons
-            })
-
-    return pd.DataFrame(data)
+    n_cities, n_years = len(cities), len(years)
+    if n_cities == 0 or n_years == 0:
+        return pd.DataFrame(columns=['city', 'year', 'population', 'change', 'migration_reasons'])
+
+    # Look up per-city constants once per distinct city and broadcast them by category code
+    city_index = pd.Categorical(cities)
+    categories = city_index.categories
+    base = np.fromiter(
+        (SYNTHETIC_BASE_POPULATIONS.get(city, 3000000) for city in categories),
+        dtype=np.float64, count=len(categories)
+    )[city_index.codes]
+
+    # Create slightly variable growth rates for each city and year
+    city_adjustment = np.fromiter(
+        (zlib.crc32(city.encode('utf-8')) % 10 for city in categories),
+        dtype=np.int64, count=len(categories)
+    )[city_index.codes] / 1000
+    growth = 1 + 0.01 + np.arange(n_years) * 0.002 + city_adjustment[:, None]
+    growth[:, 0] = 1.0  # The first year is the base population
+
+    # Compound the growth along the year axis
+    population = base[:, None] * np.cumprod(growth, axis=1)
+    change = np.diff(population, axis=1, prepend=population[:, :1])
+
+    return pd.DataFrame({
+        'city': pd.Categorical.from_codes(np.repeat(city_index.codes, n_years), categories),
+        'year': np.tile(np.asarray(years), n_cities),
+        'population': population.ravel().astype(np.int64),
+        'change': change.ravel().astype(np.int64),
+        # Generate synthetic migration reasons
+        'migration_reasons': [generate_migration_reasons(city, year) for city in cities for year in years]
+    })
 
 def merge_and_clean_data(dataframes):
     """Merge and clean data from multiple sources"""
@@ -586,26 +923,28 @@ def merge_and_clean_data(dataframes):
                     print(f"Skipping dataframe {i} due to missing columns")
                     continue
 
-            # Make sure data types are appropriate
-            df['city'] = df['city'].astype(str)
-            df['year'] = df['year'].astype(int)
-            df['population'] = df['population'].astype(float)
+            # Make sure data types are appropriate, converting all columns in one pass;
+            # years fit in int16, a quarter of the int64 footprint
+            dtypes = {'year': 'int16', 'population': float}
+            if not isinstance(df['city'].dtype, pd.CategoricalDtype):
+                dtypes['city'] = str
+            if 'change' in df.columns:
+                dtypes['change'] = float
+            df = df.astype(dtypes)
 
             # Ensure 'change' column exists
             if 'change' not in df.columns:
                 print(f"Adding missing 'change' column to dataframe {i}")
                 # Try to calculate change if there are multiple years for the same city
-                if len(df.groupby('city')) > 1:
+                if len(df.groupby('city', observed=True)) > 1:
                     # Sort by year
                     df = df.sort_values(['city', 'year'])
                     # Group by city and calculate difference
-                    df['change'] = df.groupby('city')['population'].diff().fillna(0)
+                    df['change'] = df.groupby('city', observed=True)['population'].diff().fillna(0)
                 else:
                     # Otherwise just set change to 0
                     df['change'] = 0.0
 
-            df['change'] = df['change'].astype(float)
-
             # Remove any rows with invalid data
             df = df[(df['year'] > 2000) & (df['year'] < 2030)]  # Reasonable year range
             df = df[df['population'] > 0]  # Population should be positive
@@ -623,56 +962,58 @@ def merge_and_clean_data(dataframes):
     print(f"Concatenating {len(valid_dfs)} valid dataframes")
     merged = pd.concat(valid_dfs, ignore_index=True)
 
+    # City names repeat across years and sources; store them as categorical codes
+    merged['city'] = merged['city'].astype('category')
+
     # Handle duplicate entries (same city and year in different datasets)
-    # Group by city and year, taking the mean of numerical columns
-    grouped = merged.groupby(['city', 'year']).agg({
-        'population': 'mean',
-        'change': 'mean'
-    }).reset_index()
+    # Group by city and year, taking the mean of numerical columns; the sorted
+    # group keys leave the result ordered by city and year
+    merged = merged.groupby(['city', 'year'], observed=True, sort=True, as_index=False)[['population', 'change']].mean()
 
-    print(f"After handling duplicates: {len(grouped)} unique city-year combinations")
+    print(f"After handling duplicates: {len(merged)} unique city-year combinations")
 
     # Fill missing values
-    merged = grouped
     merged['population'] = merged['population'].fillna(0)
     merged['change'] = merged['change'].fillna(0)
 
-    # Sort by city and year
-    merged = merged.sort_values(['city', 'year'])
-
-    # Add additional columns - calculate growth rate
-    try:
-        merged['growth_rate'] = merged.apply(
-            lambda row: (row['change'] / (row['population'] - row['change'])) * 100 if (row['population'] - row['change']) > 0 else 0,
-            axis=1
-        )
-    except Exception as e:
-        print(f"Error calculating growth rate: {e}")
-        # Fall back to a simpler calculation if the more complex one fails
-        merged['growth_rate'] = merged.apply(
-            lambda row: (row['change'] / row['population']) * 100 if row['population'] > 0 else 0,
-            axis=1
-        )
+    # Add additional columns - calculate growth rate relative to the previous population
+    change = merged['change'].to_numpy(dtype=float)
+    previous_population = merged['population'].to_numpy(dtype=float) - change
+    safe_previous = np.where(previous_population > 0, previous_population, 1.0)
+    merged['growth_rate'] = np.where(previous_population > 0, change / safe_previous * 100, 0.0)
 
     # Add migration related columns
-    # Group by year to calculate averages
-    yearly_avg = merged.groupby('year')['growth_rate'].mean().reset_index()
-    yearly_avg.columns = ['year', 'avg_growth_rate']
-
-    # Merge back to add relative growth
-    merged = pd.merge(merged, yearly_avg, on='year', how='left')
+    # Broadcast the yearly average growth rate back onto each row
+    merged['avg_growth_rate'] = merged.groupby('year', observed=True)['growth_rate'].transform('mean')
     merged['relative_growth'] = merged['growth_rate'] - merged['avg_growth_rate']
 
     # Classify as inflow/outflow areas
-    merged['flow_type'] = merged['relative_growth'].apply(
-        lambda x: 'inflow' if x > 0 else 'outflow'
+    merged['flow_type'] = pd.Categorical(
+        np.where(merged['relative_growth'].to_numpy() > 0, 'inflow', 'outflow'),
+        categories=['inflow', 'outflow']
     )
 
     return merged
 
+def classify_xls_columns(columns):
+    """Map spreadsheet column labels to the 'city', 'year', 'population' and 'change' fields"""
+    column_map = {}
+    for col in columns:
+        col_str = str(col)
+        col_lower = col_str.lower()
+        if '市' in col_str or 'city' in col_lower:
+            column_map['city'] = col
+        elif 'year' in col_lower or '年' in col_str or '20' in col_str[:2]:
+            column_map['year'] = col
+        elif 'pop' in col_lower or '人口' in col_str:
+            column_map['population'] = col
+        elif 'change' in col_lower or '变化' in col_str or '增加' in col_str:
+            column_map['change'] = col
+    return column_map
+
 def load_xls_data():
     """Load population data from the uploaded XLS file"""
-    xls_file = "data/liudongrenkou.xls"
+    xls_file = XLS_FILE
 
     # Ensure data directory exists
     data_dir = os.path.dirname(xls_file)
@@ -684,79 +1025,86 @@ def load_xls_data():
 
     try:
         if os.path.exists(xls_file):
+            # Excel parsing is slow, so reuse the parsed data while it is newer than the XLS file
+            if (os.path.exists(XLS_CACHE_FILE) and
+                    os.path.getmtime(XLS_CACHE_FILE) >= os.path.getmtime(xls_file)):
+                return pd.read_parquet(XLS_CACHE_FILE, engine='pyarrow')
+
             # Load the Excel file
             print(f"Loading data from {xls_file}")
-            # Try different engines since the file might be an older XLS format
-            try:
-                raw_data = pd.read_excel(xls_file, engine='openpyxl')
-            except Exception as e:
-                print(f"Error with openpyxl: {e}, trying xlrd...")
-                raw_data = pd.read_excel(xls_file, engine='xlrd')
+            # Try different engines, fastest first, since the file might be an older XLS format
+            raw_data = None
+            for engine in XLS_ENGINES:
+                try:
+                    raw_data = pd.read_excel(xls_file, engine=engine)
+                    break
+                except Exception as e:
+                    print(f"Error with {engine}: {e}")
+            if raw_data is None:
+                return pd.DataFrame()
 
             # Print the columns for debugging
             print(f"Columns in Excel file: {raw_data.columns}")
 
-            # Process the data into our standard format
-            processed_data = []
+            # Identify the columns once, then convert whole columns at a time
+            columns = classify_xls_columns(raw_data.columns)
+            n_columns = len(raw_data.columns)
+
+            # If we couldn't identify the columns, use positions as a fallback
+            if 'city' in columns:
+                city = raw_data[columns['city']]
+            elif n_columns > 0:
+                city = raw_data.iloc[:, 0]
+            else:
+                return pd.DataFrame()
+
+            if 'year' in columns:
+                year = np.trunc(pd.to_numeric(raw_data[columns['year']], errors='coerce'))
+            elif n_columns > 1:
+                year = np.trunc(pd.to_numeric(raw_data.iloc[:, 1], errors='coerce')).fillna(2022)  # Fallback year
+            else:
+                year = pd.Series(np.nan, index=raw_data.index)
+
+            if 'population' in columns:
+                population = pd.to_numeric(raw_data[columns['population']], errors='coerce')
+            elif n_columns > 2:
+                population = pd.to_numeric(raw_data.iloc[:, 2], errors='coerce')
+            else:
+                population = pd.Series(np.nan, index=raw_data.index)
+
+            # If change is not available, set it to 0
+            if 'change' in columns:
+                change = pd.to_numeric(raw_data[columns['change']], errors='coerce').fillna(0)
+            else:
+                change = pd.Series(0.0, index=raw_data.index)
+
+            # Ensure city ends with 市 if it's not already present
+            city = city.where(city.notna(), '').astype(str).str.strip()
+            city = city.where(city.str.endswith('市') | (city == ''), city + '市')
+
+            processed_data = pd.DataFrame({
+                'city': city.astype('category'),
+                'year': year,
+                'population': population,
+                'change': change
+            })
+
+            # Only keep valid entries
+            valid = (
+                (processed_data['city'] != '') &
+                (processed_data['year'].fillna(0) != 0) &
+                (processed_data['population'].fillna(0) != 0)
+            )
+            processed_data = processed_data[valid].astype({'year': int, 'change': float}).reset_index(drop=True)
 
-            # Assume the file has city names, years, population values
-            # We'll need to infer column names and adjust the processing accordingly
-            for _, row in raw_data.iterrows():
-                # Try to extract data from row based on column position
-                # This is a guess and might need adjustment based on actual file structure
+            if not processed_data.empty:
                 try:
-                    city = None
-                    year = None
-                    population = None
-                    change = None
-
-                    # Check columns to identify the data
-                    for col in raw_data.columns:
-                        col_lower = str(col).lower()
-                        if '市' in str(col) or 'city' in col_lower:
-                            city = row[col]
-                        elif 'year' in col_lower or '年' in str(col) or '20' in str(col)[:2]:
-                            year = int(str(row[col]).split('.')[0])
-                        elif 'pop' in col_lower or '人口' in str(col):
-                            population = float(row[col])
-                        elif 'change' in col_lower or '变化' in str(col) or '增加' in str(col):
-                            change = float(row[col])
-
-                    # If we couldn't identify the columns, use positions as a fallback
-                    if city is None and len(raw_data.columns) > 0:
-                        city = row[0]
-                    if year is None and len(raw_data.columns) > 1:
-                        try:
-                            year = int(float(row[1]))
-                        except:
-                            year = 2022  # Fallback year
-                    if population is None and len(raw_data.columns) > 2:
-                        try:
-                            population = float(row[2])
-                        except:
-                            continue  # Skip row if population can't be parsed
-
-                    # If change is not available, set it to 0
-                    if change is None:
-                        change = 0
-
-                    # Ensure city ends with 市 if it's not already present
-                    if city and not str(city).endswith('市'):
-                        city = f"{city}市"
-
-                    # Only add valid entries
-                    if city and year and population:
-                        processed_data.append({
-                            'city': city,
-                            'year': year,
-                            'population': population,
-                            'change': change
-                        })
-                except Exception as e:
-                    print(f"Error processing row: {e}")
-                    continue
+                    atomic_write(XLS_CACHE_FILE, lambda tmp_path: processed_data.to_parquet(
+                        tmp_path, engine='pyarrow', compression='snappy', index=False))
+                except OSError as e:
+                    print(f"Could not cache parsed XLS data: {e}")
 
-            return pd.DataFrame(processed_data)
+            return processed_data
         else:
             print(f"XLS file {xls_file} not found")
             return pd.DataFrame()
@@ -811,28 +1159,13 @@ def scrape_population_data(use_synthetic=True):
         print(f"Successfully loaded data from XLS file: {len(xls_data)} records")
         data_sources.append(xls_data)
 
-    try:
-        # Run enhanced async scraping
-        enhanced_data = asyncio.run(enhanced_scraping())
-        if not enhanced_data.empty:
-            print(f"Successfully scraped data using enhanced scraping: {len(enhanced_data)} records")
-            data_sources.append(enhanced_data)
-    except Exception as e:
-        print(f"Error in enhanced scraping: {e}")
-
-    # Fallback to traditional scraping methods if needed
-    if not data_sources:
-        bl_data = scrape_bl_gov_cn()
-        if not bl_data.empty:
-            data_sources.append(bl_data)
-
-        stats_data = scrape_stats_gd_gov_cn()
-        if not stats_data.empty:
-            data_sources.append(stats_data)
-
-        supp_data = scrape_supplementary_sources()
-        if not supp_data.empty:
-            data_sources.append(supp_data)
+    # Run enhanced async scraping, falling back to the individual web sources
+    # (scraped concurrently over the same session) if nothing else produced data
+    enhanced_data, web_data = asyncio.run(scrape_all_sources_async(fallback=not data_sources))
+    if not enhanced_data.empty:
+        print(f"Successfully scraped data using enhanced scraping: {len(enhanced_data)} records")
+        data_sources.append(enhanced_data)
+    data_sources.extend(df for df in web_data.values() if not df.empty)
 
     # Merge and clean the data
     if not data_sources:
@@ -4,21 +4,6 @@ This file serves as the main entry point for Streamlit Cloud deployment.
 """
 
 import streamlit as st
-import pandas as pd
-# Import functions from local modules
-from data_processor import process_data, calculate_statistics
-from scraper import scrape_population_data
-
-# Define load_data function to match app.py
-def load_data():
-    """Load population data from various sources"""
-    return scrape_population_data(use_synthetic=True)
-from visualizer import create_flow_map, create_trend_chart, create_comparison_chart
-from advanced_visualizations import create_population_pie_chart, create_growth_bar_chart, create_population_dashboard
-from utils import get_guangdong_cities
-from translations import get_translation, LANGUAGES
-import time
-import asyncio
 
 # Page config
 st.set_page_config(
@@ -28,6 +13,33 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Import the local modules (pandas, the scraper stack) only after the page
+# config, so the first paint doesn't wait on them; later reruns find them in sys.modules
+with st.spinner("Loading..."):
+    # Import functions from local modules
+    from data_processor import process_data, calculate_statistics
+    from scraper import scrape_population_data
+    from utils import get_guangdong_cities
+    from translations import make_translator, LANGUAGES
+    from exports import to_csv_bytes, to_excel_bytes
+    from cached_visualizations import cached_flow_map, cached_trend_chart, cached_comparison_chart
+
+# Language codes in selector order
+LANGUAGE_CODES = tuple(LANGUAGES)
+
+# Define load_data function to match app.py; cached per process so new sessions
+# and reruns reuse the loaded frame instead of regenerating it
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_data():
+    """Load population data from various sources"""
+    return scrape_population_data(use_synthetic=True)
+
+@st.cache_data(show_spinner=False)
+def load_cities():
+    """City names with their lowercase forms, lowered once for the filter box"""
+    cities = get_guangdong_cities()
+    return cities, [city.lower() for city in cities]
+
 # Initialize session state
 if 'data_loaded' not in st.session_state:
     st.session_state.data_loaded = False
@@ -36,22 +48,96 @@ if 'data' not in st.session_state:
 if 'language' not in st.session_state:
     st.session_state.language = 'en'
 
-def t(key):
-    """Get translated text"""
-    return get_translation(key, st.session_state.language)
+# Translate with the current language's table for the rest of this run; the language
+# selector writes st.session_state.language before the rerun starts
+t = make_translator(st.session_state.language)
+
+@st.fragment
+def render_visualizations(processed_data, selected_cities, analysis_type):
+    """Draw the selected chart; as a fragment, switching views reruns only this part of the page"""
+    # Select one visualization at a time; unlike st.tabs, only the chosen view is built per rerun
+    view = st.radio(
+        t('select_view'),
+        ['population_flow_map', 'trend_analysis', 'city_comparison',
+         'growth_analysis', 'dashboard', 'migration_reasons'],
+        format_func=t,
+        horizontal=True,
+        label_visibility='collapsed'
+    )
+
+    # Chart modules are imported in the view that draws them, after the metrics paint
+    if view == 'population_flow_map':
+        with st.spinner(t('generating_map')):
+            flow_map = cached_flow_map(processed_data, selected_cities, analysis_type)
+            st.plotly_chart(flow_map, use_container_width=True)
+
+    elif view == 'trend_analysis':
+        with st.spinner(t('analyzing_trends')):
+            trend_chart = cached_trend_chart(processed_data)
+            st.plotly_chart(trend_chart, use_container_width=True)
+
+    elif view == 'city_comparison':
+        with st.spinner(t('comparing_cities')):
+            comparison_chart = cached_comparison_chart(processed_data, selected_cities)
+            st.plotly_chart(comparison_chart, use_container_width=True)
+
+    elif view == 'growth_analysis':
+        from advanced_visualizations import create_growth_bar_chart
+        with st.spinner(t('analyzing_growth')):
+            growth_chart = create_growth_bar_chart(processed_data, selected_cities)
+            st.plotly_chart(growth_chart, use_container_width=True)
+
+    elif view == 'dashboard':
+        from advanced_visualizations import create_population_dashboard
+        with st.spinner(t('creating_dashboard')):
+            dashboard = create_population_dashboard(processed_data, selected_cities)
+            st.plotly_chart(dashboard, use_container_width=True)
+
+    elif view == 'migration_reasons':
+        st.subheader(t('migration_reasons_title'))
+
+        if 'migration_reasons' in processed_data.columns:
+            from reason_visualizations import (
+                create_reason_treemap, create_reason_sankey, create_reason_heatmap, create_reason_timeline
+            )
+
+            # Create subtabs for different visualizations
+            reason_tab1, reason_tab2, reason_tab3, reason_tab4 = st.tabs([
+                t('reason_distribution'),
+                t('reason_sankey'),
+                t('reason_heatmap'),
+                t('reason_timeline')
+            ])
+
+            with reason_tab1:
+                # Overall distribution
+                st.write(t('overall_distribution'))
+
+            # Treemap, sankey, heatmap and timeline, one per subtab
+            reason_charts = [
+                (reason_tab1, create_reason_treemap, "Creating treemap visualization..."),
+                (reason_tab2, create_reason_sankey, "Creating sankey diagram..."),
+                (reason_tab3, create_reason_heatmap, "Creating heatmap visualization..."),
+                (reason_tab4, create_reason_timeline, "Creating timeline visualization...")
+            ]
+            for reason_tab, create_reason_chart, spinner_text in reason_charts:
+                with reason_tab, st.spinner(spinner_text):
+                    reason_fig = create_reason_chart(processed_data)
+                    if reason_fig:
+                        st.plotly_chart(reason_fig, use_container_width=True)
+        else:
+            st.info("No migration reasons data available. Please ensure your data includes migration reasons information.")
 
 # Sidebar
 with st.sidebar:
-    # Language selector
-    lang = st.selectbox(
+    # Language selector, bound to st.session_state.language; the change takes effect
+    # in the rerun the widget triggers, so no extra st.rerun() is needed
+    st.selectbox(
         "Language/语言",
-        options=list(LANGUAGES.keys()),
-        format_func=lambda x: LANGUAGES[x],
-        index=list(LANGUAGES.keys()).index(st.session_state.language)
+        options=LANGUAGE_CODES,
+        format_func=LANGUAGES.get,
+        key='language'
     )
-    if lang != st.session_state.language:
-        st.session_state.language = lang
-        st.rerun()
 
     st.title(t('sidebar_title'))
 
@@ -69,7 +155,7 @@ with st.sidebar:
 
     # City selection
     st.subheader(t('select_cities'))
-    cities = get_guangdong_cities()
+    cities, cities_lower = load_cities()
 
     # Add select all/none buttons
     col1, col2 = st.columns(2)
@@ -82,7 +168,11 @@ with st.sidebar:
 
     # City filter
     city_filter = st.text_input(t('filter_cities'))
-    filtered_cities = [city for city in cities if city_filter.lower() in city.lower()]
+    city_query = city_filter.lower()
+    if city_query:
+        filtered_cities = [city for city, lowered in zip(cities, cities_lower) if city_query in lowered]
+    else:
+        filtered_cities = cities
 
     # City multiselect
     selected_cities = st.multiselect(
@@ -138,89 +228,7 @@ if st.session_state.data_loaded and st.session_state.data is not None:
             delta=f"{stats.get('growth_rate_change', 0):.2f}%"
         )
 
-    # Create tabs for different visualizations
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        t('population_flow_map'),
-        t('trend_analysis'),
-        t('city_comparison'),
-        t('growth_analysis'),
-        t('dashboard'),
-        t('migration_reasons')
-    ])
-
-    with tab1:
-        with st.spinner(t('generating_map')):
-            flow_map = create_flow_map(processed_data, selected_cities, analysis_type)
-            st.plotly_chart(flow_map, use_container_width=True)
-
-    with tab2:
-        with st.spinner(t('analyzing_trends')):
-            trend_chart = create_trend_chart(processed_data)
-            st.plotly_chart(trend_chart, use_container_width=True)
-
-    with tab3:
-        with st.spinner(t('comparing_cities')):
-            comparison_chart = create_comparison_chart(processed_data, selected_cities)
-            st.plotly_chart(comparison_chart, use_container_width=True)
-
-    with tab4:
-        with st.spinner(t('analyzing_growth')):
-            growth_chart = create_growth_bar_chart(processed_data, selected_cities)
-            st.plotly_chart(growth_chart, use_container_width=True)
-
-    with tab5:
-        with st.spinner(t('creating_dashboard')):
-            dashboard = create_population_dashboard(processed_data, selected_cities)
-            st.plotly_chart(dashboard, use_container_width=True)
-
-    with tab6:
-        st.subheader(t('migration_reasons_title'))
-
-        if 'migration_reasons' in processed_data.columns:
-            # Create subtabs for different visualizations
-            reason_tab1, reason_tab2, reason_tab3, reason_tab4 = st.tabs([
-                t('reason_distribution'),
-                t('reason_sankey'),
-                t('reason_heatmap'),
-                t('reason_timeline')
-            ])
-
-            with reason_tab1:
-                # Overall distribution
-                st.write(t('overall_distribution'))
-
-                # Import visualization functions
-                from reason_visualizations import create_reason_treemap
-                with st.spinner("Creating treemap visualization..."):
-                    treemap_fig = create_reason_treemap(processed_data)
-                    if treemap_fig:
-                        st.plotly_chart(treemap_fig, use_container_width=True)
-
-            with reason_tab2:
-                # Sankey diagram
-                from reason_visualizations import create_reason_sankey
-                with st.spinner("Creating sankey diagram..."):
-                    sankey_fig = create_reason_sankey(processed_data)
-                    if sankey_fig:
-                        st.plotly_chart(sankey_fig, use_container_width=True)
-
-            with reason_tab3:
-                # Heatmap visualization
-                from reason_visualizations import create_reason_heatmap
-                with st.spinner("Creating heatmap visualization..."):
-                    heatmap_fig = create_reason_heatmap(processed_data)
-                    if heatmap_fig:
-                        st.plotly_chart(heatmap_fig, use_container_width=True)
-
-            with reason_tab4:
-                # Timeline visualization
-                from reason_visualizations import create_reason_timeline
-                with st.spinner("Creating timeline visualization..."):
-                    timeline_fig = create_reason_timeline(processed_data)
-                    if timeline_fig:
-                        st.plotly_chart(timeline_fig, use_container_width=True)
-        else:
-            st.info("No migration reasons data available. Please ensure your data includes migration reasons information.")
+    render_visualizations(processed_data, selected_cities, analysis_type)
 
     # Data export options
     st.subheader(t('export_data'))
@@ -228,22 +236,17 @@ if st.session_state.data_loaded and st.session_state.data is not None:
     with col1:
         st.download_button(
             t('download_csv'),
-            data=processed_data.to_csv(index=False).encode('utf-8'),
+            data=to_csv_bytes(processed_data),
             file_name=f"guangdong_population_data_{selected_period}.csv",
             mime='text/csv'
         )
     with col2:
-        excel_buffer = pd.ExcelWriter(f"guangdong_population_data_{selected_period}.xlsx", engine='openpyxl')
-        processed_data.to_excel(excel_buffer, index=False)
-        excel_buffer.close()
-
-        with open(f"guangdong_population_data_{selected_period}.xlsx", 'rb') as f:
-            st.download_button(
-                t('download_excel'),
-                data=f,
-                file_name=f"guangdong_population_data_{selected_period}.xlsx",
-                mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
+        st.download_button(
+            t('download_excel'),
+            data=to_excel_bytes(processed_data),
+            file_name=f"guangdong_population_data_{selected_period}.xlsx",
+            mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
 
     # Display statistical summary
     with st.expander(t('statistical_summary')):
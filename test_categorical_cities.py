@@ -0,0 +1,80 @@
+"""
+Regression test for the categorical city column: process_data and every chart builder
+must handle a selected city that has no rows left after validation.
+"""
+
+import contextlib
+import io
+import warnings
+
+import plotly.graph_objects as go
+import pytest
+
+from scraper import generate_synthetic_data, merge_and_clean_data
+from data_processor import process_data
+from utils import get_guangdong_cities
+from visualizer import create_flow_map, create_trend_chart, create_comparison_chart
+from advanced_visualizations import (
+    create_population_pie_chart, create_growth_bar_chart, create_population_dashboard
+)
+from reason_visualizations import (
+    create_reason_sankey, create_reason_heatmap, create_reason_treemap,
+    create_reason_timeline, create_reason_radar
+)
+
+def load_processed_data():
+    """Processed data for five cities, one of which fails validation on every row"""
+    # Build the synthetic frame the way scrape_population_data does, without saving it to the cache
+    with contextlib.redirect_stdout(io.StringIO()):
+        cities = get_guangdong_cities()
+        data = merge_and_clean_data([generate_synthetic_data(cities)])
+        selected_cities = list(cities)[:5]
+
+    # No city may exceed 50M people, so every row of the first city is dropped
+    data = data.copy()
+    data.loc[data['city'] == selected_cities[0], 'population'] = 6e7
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        processed_data = process_data(data, selected_cities, '2018-2024', 'Net Migration')
+    return processed_data, selected_cities
+
+def test_filtered_city_is_dropped_from_categories():
+    """The invalid city leaves neither rows nor an unused category behind"""
+    processed_data, selected_cities = load_processed_data()
+
+    assert str(processed_data['city'].dtype) == 'category'
+    assert selected_cities[0] not in set(processed_data['city'])
+    assert list(processed_data['city'].cat.categories) == sorted(selected_cities[1:])
+
+@pytest.mark.parametrize('create_chart', [
+    lambda data, cities: create_trend_chart(data, True, True),
+    create_comparison_chart,
+    create_population_pie_chart,
+    create_growth_bar_chart,
+    create_population_dashboard,
+    lambda data, cities: create_reason_sankey(data),
+    lambda data, cities: create_reason_heatmap(data),
+    lambda data, cities: create_reason_treemap(data),
+    lambda data, cities: create_reason_timeline(data),
+    lambda data, cities: create_reason_radar(data, cities[1]),
+])
+def test_chart_builders_accept_categorical_cities(create_chart):
+    """Each chart builds without warnings on categorical cities with a filtered-out city"""
+    processed_data, selected_cities = load_processed_data()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', FutureWarning)
+        fig = create_chart(processed_data, selected_cities)
+
+    assert isinstance(fig, go.Figure)
+
+@pytest.mark.skipif(not hasattr(go, 'Scattermapbox'), reason="Plotly without Scattermapbox")
+def test_flow_map_accepts_categorical_cities():
+    """The flow map builds on categorical cities with a filtered-out city"""
+    processed_data, selected_cities = load_processed_data()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', FutureWarning)
+        fig = create_flow_map(processed_data, selected_cities, 'Net Migration')
+
+    assert isinstance(fig, go.Figure)
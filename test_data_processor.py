@@ -0,0 +1,64 @@
+"""
+Tests for the vectorized data point validation, checked against the original per-row rules.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_processor import validate_data_points
+
+def reference_validate_data_point(row):
+    """The original per-row validation, applied with DataFrame.apply(axis=1)"""
+    try:
+        if not row['city'].strip().endswith('市'):
+            return False
+
+        current_year = datetime.now().year
+        if not (2000 <= row['year'] <= current_year):
+            return False
+
+        if row['population'] <= 0:
+            return False
+
+        if row['population'] > 50000000:
+            return False
+
+        if 'change' in row and pd.notna(row['change']):
+            if abs(row['change']) > row['population'] * 0.5:
+                return False
+
+        return True
+    except Exception:
+        return False
+
+def make_rows():
+    """Rows covering each rule, its boundaries and the missing-value cases"""
+    current_year = datetime.now().year
+    return pd.DataFrame({
+        'city': ['广州市', ' 深圳市 ', '香港', '佛山市', '东莞市', '珠海市', '中山市', '江门市',
+                 '惠州市', '汕头市', '湛江市', '茂名市', '肇庆市', np.nan, '韶关市', '清远市'],
+        'year': [2020, 2000, 2020, 1999, current_year + 1, 2020, 2020, 2020,
+                 2020, 2020, 2020, 2020, 2020, 2020, current_year, 2020],
+        'population': [1e7, 5e7, 1e6, 1e6, 1e6, 0, -5, 50000001,
+                       1e6, 1e6, np.nan, 1e6, 1e6, 1e6, 1e6, 1e6],
+        'change': [1e5, 0, 0, 0, 0, 0, 0, 0,
+                   5e5, 500001, 0, np.nan, -600000, 0, -5e5, 0],
+    })
+
+@pytest.mark.parametrize('variant', ['object', 'category', 'no_change'])
+def test_validation_mask_matches_per_row_rules(variant):
+    """The mask agrees with the per-row rules for string and categorical cities, with and without change"""
+    rows = make_rows()
+    if variant == 'category':
+        rows['city'] = rows['city'].astype('category')
+    elif variant == 'no_change':
+        rows = rows.drop(columns=['change'])
+
+    expected = rows.apply(reference_validate_data_point, axis=1).tolist()
+    mask = validate_data_points(rows)
+
+    assert mask.dtype == bool
+    assert mask.tolist() == expected
@@ -0,0 +1,65 @@
+"""
+Tests for the closed-form population forecast, checked against the original per-city polyfit.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import forecast_population
+
+def reference_forecast_population(data, years_ahead=5):
+    """The original forecast: one np.polyfit per city with at least two points"""
+    forecasts = []
+    for city in data['city'].unique():
+        city_data = data[data['city'] == city].sort_values('year')
+        if len(city_data) > 1:
+            slope, intercept = np.polyfit(city_data['year'].values, city_data['population'].values, 1)
+            last_year = city_data['year'].max()
+            for i in range(1, years_ahead + 1):
+                forecasts.append({
+                    'city': city,
+                    'year': last_year + i,
+                    'population': intercept + slope * (last_year + i)
+                })
+    return pd.DataFrame(forecasts)
+
+def make_history():
+    """Shuffled yearly populations for a few cities, one of them with a single point"""
+    rng = np.random.default_rng(0)
+    rows = []
+    for city, base, growth, years in [('广州市', 1.8e7, 4e5, range(2010, 2025)),
+                                      ('深圳市', 1.3e7, 6e5, range(2015, 2025)),
+                                      ('珠海市', 1.9e6, 5e4, [2018, 2020, 2024]),
+                                      ('潮州市', 2.6e6, -1e4, [2024])]:
+        for year in years:
+            rows.append({'city': city, 'year': year,
+                         'population': base + growth * (year - 2010) + rng.normal(0, 5e4)})
+    return pd.DataFrame(rows).sample(frac=1, random_state=1).reset_index(drop=True)
+
+@pytest.mark.parametrize('city_dtype', ['object', 'category'])
+def test_forecast_matches_per_city_polyfit(city_dtype):
+    """Forecasts agree with per-city polyfit, and single-point cities are dropped"""
+    history = make_history()
+    history['city'] = history['city'].astype(city_dtype)
+    if city_dtype == 'category':
+        history['city'] = history['city'].cat.add_categories(['韶关市'])  # Unused category
+        history['year'] = history['year'].astype('int16')
+
+    forecast = forecast_population(history, years_ahead=3)
+    expected = reference_forecast_population(history, years_ahead=3)
+
+    forecast = forecast.sort_values(['city', 'year']).reset_index(drop=True)
+    expected = expected.sort_values(['city', 'year']).reset_index(drop=True)
+    assert forecast['city'].astype(str).tolist() == expected['city'].astype(str).tolist()
+    assert forecast['year'].tolist() == expected['year'].tolist()
+    np.testing.assert_allclose(forecast['population'], expected['population'], rtol=1e-9)
+    np.testing.assert_allclose(forecast['lower_bound'], forecast['population'] * 0.95)
+    np.testing.assert_allclose(forecast['upper_bound'], forecast['population'] * 1.05)
+    assert forecast['is_forecast'].all()
+
+def test_forecast_without_fittable_cities_is_empty():
+    """Cities with a single year give no forecast"""
+    history = pd.DataFrame({'city': ['广州市', '深圳市'], 'year': [2024, 2024], 'population': [1.8e7, 1.7e7]})
+
+    assert forecast_population(history).empty
@@ -0,0 +1,56 @@
+"""
+Tests for the batched trend-line fit in the trend chart, checked against scipy's linregress.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from visualizer import create_trend_chart
+
+def make_chart_data():
+    """Shuffled processed-style rows for a few cities, one flat and one with a single year"""
+    rng = np.random.default_rng(0)
+    rows = []
+    for city, base, growth in [('广州市', 1.8e7, 4e5), ('深圳市', 1.3e7, 6e5),
+                               ('珠海市', 1.9e6, -2e4), ('中山市', 4.4e6, 0)]:
+        for year in range(2018, 2025):
+            noise = 0 if growth == 0 else rng.normal(0, 5e4)
+            rows.append({'city': city, 'year': year, 'population': base + growth * (year - 2018) + noise})
+    rows.append({'city': '潮州市', 'year': 2024, 'population': 2.6e6})
+    data = pd.DataFrame(rows).sample(frac=1, random_state=1).reset_index(drop=True)
+    data['change'] = 0.0
+    return data
+
+def trend_lines(fig):
+    """Map each city to its trend line's (r, x, y) from the figure"""
+    lines = {}
+    for trace in fig.data:
+        match = re.fullmatch(r'(.+) Trend \(r=(-?[\d.]+|nan)\)', trace.name or '')
+        if match:
+            lines[match.group(1)] = (float(match.group(2)), list(trace.x), np.asarray(trace.y))
+    return lines
+
+@pytest.mark.parametrize('normalize_data', [False, True])
+@pytest.mark.parametrize('city_dtype', ['object', 'category'])
+def test_trend_lines_match_linregress(normalize_data, city_dtype):
+    """Each city's trend line agrees with a per-city linregress; single-year cities get none"""
+    data = make_chart_data()
+    data['city'] = data['city'].astype(city_dtype)
+
+    lines = trend_lines(create_trend_chart(data, show_trend_lines=True, normalize_data=normalize_data))
+
+    assert set(lines) == {'广州市', '深圳市', '珠海市', '中山市'}
+    for city, (r_value, x_trend, y_trend) in lines.items():
+        city_data = data[data['city'] == city].sort_values('year')
+        y = city_data['population'].to_numpy()
+        if normalize_data:
+            y = y / y[0] * 100
+        expected = stats.linregress(city_data['year'].to_numpy(), y)
+
+        assert x_trend == [city_data['year'].min(), city_data['year'].max()]
+        np.testing.assert_allclose(y_trend, expected.intercept + expected.slope * np.array(x_trend), rtol=1e-6)
+        assert f'{r_value:.2f}' == f'{expected.rvalue:.2f}'
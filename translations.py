@@ -1,3 +1,5 @@
+import functools
+
 # Define all UI strings in multiple languages
 
 LANGUAGES = {
@@ -323,10 +325,6 @@ TRANSLATIONS = {
         'en': 'Overall Distribution of Migration Reasons',
         'zh': '迁移原因整体分布'
     },
-    'reason_distribution': {
-        'en': 'Distribution of Migration Reasons',
-        'zh': '迁移原因分布'
-    },
     'top_reasons_by_city': {
         'en': 'Top Migration Reasons by City',
         'zh': '各城市主要迁移原因'
@@ -430,9 +428,55 @@ TRANSLATIONS = {
     'growth_analysis': {
         'en': 'Growth Analysis',
         'zh': '增长分析'
+    },
+    'select_view': {
+        'en': 'Select View',
+        'zh': '选择视图'
     }
 }
 
+class TranslationTable(dict):
+    """Translated text by key; a missing key looks up as the key itself"""
+    def __missing__(self, key):
+        return key
+
+# Per-language lookup tables with the English text filled in for missing keys, built
+# once at import so a lookup is a single dict probe
+_ENGLISH_TRANSLATIONS = TranslationTable(
+    (key, texts['en']) for key, texts in TRANSLATIONS.items() if 'en' in texts
+)
+TRANSLATIONS_BY_LANG = {
+    lang: TranslationTable(
+        {**_ENGLISH_TRANSLATIONS, **{key: texts[lang] for key, texts in TRANSLATIONS.items() if lang in texts}}
+    )
+    for lang in LANGUAGES
+}
+
+def get_translation_table(language='en'):
+    """
+    Get the key-to-text mapping for a language, falling back to English
+    
+    Args:
+        language (str): Language code ('en' or 'zh')
+        
+    Returns:
+        TranslationTable: Translated text by key; unknown languages get the English table
+    """
+    return TRANSLATIONS_BY_LANG.get(language, _ENGLISH_TRANSLATIONS)
+
+def make_translator(language='en'):
+    """
+    Get a one-argument lookup function bound to a language's table
+    
+    Args:
+        language (str): Language code ('en' or 'zh')
+        
+    Returns:
+        callable: key -> translated text, or the key itself if no translation is found
+    """
+    return get_translation_table(language).__getitem__
+
+@functools.lru_cache(maxsize=256)  # ~100 keys in two languages
 def get_translation(key, language='en'):
     """
     Get translated text for a given key and language
@@ -444,12 +488,5 @@ def get_translation(key, language='en'):
     Returns:
         str: Translated text or the key itself if translation not found
     """
-    if key in TRANSLATIONS and language in TRANSLATIONS[key]:
-        return TRANSLATIONS[key][language]
-    
-    # Fallback to English if the translation is not found
-    if key in TRANSLATIONS and 'en' in TRANSLATIONS[key]:
-        return TRANSLATIONS[key]['en']
-    
-    # Return the key as is if no translation is found
-    return key
+    # The table falls back to the key itself when no translation is found
+    return get_translation_table(language)[key]
@@ -1,38 +1,55 @@
+import functools
 import json
 import os
 import re
+import tempfile
 import pandas as pd
 import numpy as np
 
+# Time period strings in the form "YYYY-YYYY"
+YEAR_RANGE_RE = re.compile(r'(\d{4})-(\d{4})')
+
+@functools.lru_cache(maxsize=1)  # The city list never changes; read the file once
 def get_guangdong_cities():
     """
     Get list of major cities in Guangdong Province
     
     Returns:
-        list: List of city names in Chinese
+        tuple: City names in Chinese; immutable, since every caller shares the cached result
     """
     # Load cities from the JSON file if it exists
     cities_file = "assets/guangdong_cities.json"
     if os.path.exists(cities_file):
         try:
             with open(cities_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                return tuple(json.load(f))
         except Exception:
             pass
     
     # Default list of cities in Guangdong Province
-    cities = [
+    cities = (
         "广州市", "深圳市", "佛山市", "东莞市", "珠海市", 
         "中山市", "惠州市", "江门市", "肇庆市", "茂名市",
         "湛江市", "汕头市", "揭阳市", "梅州市", "汕尾市",
         "河源市", "韶关市", "清远市", "云浮市", "阳江市",
         "潮州市"
-    ]
+    )
     
-    # Save to JSON for future use
-    os.makedirs("assets", exist_ok=True)
-    with open(cities_file, 'w', encoding='utf-8') as f:
-        json.dump(cities, f, ensure_ascii=False)
+    # Save to JSON for future use, only if no file is there yet (an unreadable one is
+    # left alone); the temporary file is renamed into place so concurrent workers never
+    # read a partial write
+    if not os.path.exists(cities_file):
+        tmp_path = None
+        try:
+            os.makedirs("assets", exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir="assets", suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(cities, f, ensure_ascii=False)
+            os.replace(tmp_path, cities_file)
+        except OSError as e:
+            print(f"Could not save city list: {e}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
     
     return cities
 
@@ -46,7 +63,7 @@ def extract_year_range(time_period):
     Returns:
         tuple: (start_year, end_year)
     """
-    match = re.match(r'(\d{4})-(\d{4})', time_period)
+    match = YEAR_RANGE_RE.match(time_period)
     if match:
         start_year, end_year = map(int, match.groups())
         return start_year, end_year
@@ -60,32 +77,38 @@ def calculate_migration_efficiency(inflow, outflow):
     Calculate migration efficiency index
     
     Args:
-        inflow (float): Population inflow
-        outflow (float): Population outflow
+        inflow (float or array-like): Population inflow
+        outflow (float or array-like): Population outflow
         
     Returns:
-        float: Migration efficiency index (-1 to 1)
+        float or ndarray: Migration efficiency index (-1 to 1), element-wise for arrays
     """
-    if inflow + outflow == 0:
-        return 0
+    inflow = np.asarray(inflow, dtype=float)
+    outflow = np.asarray(outflow, dtype=float)
+    total = inflow + outflow
     
-    return (inflow - outflow) / (inflow + outflow)
+    # Zero where there is no flow at all, without a per-element branch
+    efficiency = np.divide(inflow - outflow, total, out=np.zeros_like(total), where=total != 0)
+    return efficiency[()]
 
 def calculate_migration_impact(migration, population):
     """
     Calculate migration impact index
     
     Args:
-        migration (float): Net migration
-        population (float): Total population
+        migration (float or array-like): Net migration
+        population (float or array-like): Total population
         
     Returns:
-        float: Migration impact index
+        float or ndarray: Migration impact index, element-wise for arrays
     """
-    if population == 0:
-        return 0
+    migration, population = np.broadcast_arrays(
+        np.asarray(migration, dtype=float), np.asarray(population, dtype=float)
+    )
     
-    return (migration / population) * 100  # As percentage
+    # Zero where there is no population, without a per-element branch
+    impact = np.divide(migration, population, out=np.zeros_like(population), where=population != 0)
+    return (impact * 100)[()]  # As percentage
 
 def forecast_population(data, years_ahead=5):
     """
@@ -101,40 +124,47 @@ def forecast_population(data, years_ahead=5):
     if data.empty or 'year' not in data or 'population' not in data:
         return pd.DataFrame()
     
-    forecasts = []
-    
-    for city in data['city'].unique():
-        city_data = data[data['city'] == city].sort_values('year')
-        
-        if len(city_data) > 1:  # Need at least two points for regression
-            # Prepare data for regression
-            x = city_data['year'].values.reshape(-1, 1)
-            y = city_data['population'].values
-            
-            # Simple linear regression
-            coefficients = np.polyfit(x.flatten(), y, 1)
-            slope, intercept = coefficients
-            
-            # Forecast future years
-            last_year = city_data['year'].max()
-            for i in range(1, years_ahead + 1):
-                forecast_year = last_year + i
-                forecast_population = intercept + slope * forecast_year
-                
-                forecasts.append({
-                    'city': city,
-                    'year': forecast_year,
-                    'population': forecast_population,
-                    'is_forecast': True
-                })
-    
-    if not forecasts:
+    # Closed-form least squares per city (slope = Sxy / Sxx on year-centred data),
+    # summed per city code with bincount instead of a polyfit call per city
+    codes, city_names = pd.factorize(data['city'], sort=False)
+    has_city = codes >= 0
+    codes = codes[has_city]
+    years = data['year'].to_numpy()[has_city]
+    x = years.astype(float)
+    y = data['population'].to_numpy(dtype=float)[has_city]
+    
+    n_cities = len(city_names)
+    points = np.bincount(codes, minlength=n_cities)
+    x_mean = np.bincount(codes, weights=x, minlength=n_cities) / points
+    y_mean = np.bincount(codes, weights=y, minlength=n_cities) / points
+    centred_x = x - x_mean[codes]
+    sxy = np.bincount(codes, weights=centred_x * (y - y_mean[codes]), minlength=n_cities)
+    sxx = np.bincount(codes, weights=centred_x * centred_x, minlength=n_cities)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slopes = sxy / sxx  # Single-point cities have sxx == 0 and are dropped below
+    intercepts = y_mean - slopes * x_mean
+    last_years = np.full(n_cities, years.min(initial=0), dtype=years.dtype)
+    np.maximum.at(last_years, codes, years)
+    
+    fitted = points > 1  # Need at least two points for regression
+    if not fitted.any():
         return pd.DataFrame()
     
-    forecast_df = pd.DataFrame(forecasts)
+    cities = np.asarray(city_names, dtype=object)[fitted]
+    slopes, intercepts, last_years = slopes[fitted], intercepts[fitted], last_years[fitted]
+    
+    # Forecast future years for all cities at once, one row per city and year
+    forecast_years = last_years[:, None] + np.arange(1, years_ahead + 1)
+    forecast_population = intercepts[:, None] + slopes[:, None] * forecast_years
     
-    # Add confidence intervals
-    forecast_df['lower_bound'] = forecast_df['population'] * 0.95  # Simple 5% lower bound
-    forecast_df['upper_bound'] = forecast_df['population'] * 1.05  # Simple 5% upper bound
+    forecast_population = forecast_population.ravel()
     
-    return forecast_df
+    return pd.DataFrame({
+        'city': np.repeat(cities, years_ahead),
+        'year': forecast_years.ravel(),
+        'population': forecast_population,
+        'is_forecast': True,
+        # Add confidence intervals on the raw array, as part of the one frame construction
+        'lower_bound': forecast_population * 0.95,  # Simple 5% lower bound
+        'upper_bound': forecast_population * 1.05  # Simple 5% upper bound
+    })
@@ -3,7 +3,35 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
-from scipy import stats
+
+# Approximate [longitude, latitude] of each Guangdong city for the flow map
+CITY_COORDINATES = {
+    "广州市": [113.2644, 23.1291],
+    "深圳市": [114.0579, 22.5431],
+    "佛山市": [113.1231, 23.0229],
+    "东莞市": [113.7518, 23.0209],
+    "珠海市": [113.5762, 22.2701],
+    "中山市": [113.3922, 22.5176],
+    "惠州市": [114.4161, 23.1133],
+    "江门市": [113.0781, 22.5903],
+    "肇庆市": [112.4709, 23.0466],
+    "茂名市": [110.9254, 21.6618],
+    "湛江市": [110.3594, 21.2707],
+    "汕头市": [116.6827, 23.3535],
+    "揭阳市": [116.3722, 23.5498],
+    "梅州市": [116.1187, 24.3045],
+    "汕尾市": [115.3729, 22.7713],
+    "河源市": [114.6978, 23.7462],
+    "韶关市": [113.5972, 24.8011],
+    "清远市": [113.0507, 23.6821],
+    "云浮市": [112.0441, 22.9138],
+    "阳江市": [111.9755, 21.8589],
+    "潮州市": [116.6323, 23.6618]
+}
+
+# Latitude and longitude by city, for attaching coordinates to a whole city column at once
+CITY_LATITUDES = pd.Series({city: lat for city, (lon, lat) in CITY_COORDINATES.items()})
+CITY_LONGITUDES = pd.Series({city: lon for city, (lon, lat) in CITY_COORDINATES.items()})
 
 def create_flow_map(data, selected_cities, analysis_type):
     """
@@ -17,64 +45,42 @@ def create_flow_map(data, selected_cities, analysis_type):
     Returns:
         Figure: Plotly figure object with the map
     """
-    # Create city coordinates - approximate values for Guangdong cities
-    city_coordinates = {
-        "广州市": [113.2644, 23.1291],
-        "深圳市": [114.0579, 22.5431],
-        "佛山市": [113.1231, 23.0229],
-        "东莞市": [113.7518, 23.0209],
-        "珠海市": [113.5762, 22.2701],
-        "中山市": [113.3922, 22.5176],
-        "惠州市": [114.4161, 23.1133],
-        "江门市": [113.0781, 22.5903],
-        "肇庆市": [112.4709, 23.0466],
-        "茂名市": [110.9254, 21.6618],
-        "湛江市": [110.3594, 21.2707],
-        "汕头市": [116.6827, 23.3535],
-        "揭阳市": [116.3722, 23.5498],
-        "梅州市": [116.1187, 24.3045],
-        "汕尾市": [115.3729, 22.7713],
-        "河源市": [114.6978, 23.7462],
-        "韶关市": [113.5972, 24.8011],
-        "清远市": [113.0507, 23.6821],
-        "云浮市": [112.0441, 22.9138],
-        "阳江市": [111.9755, 21.8589],
-        "潮州市": [116.6323, 23.6618]
-    }
-    
     # Prepare data for map
-    map_data = []
+    map_df = pd.DataFrame()
     
     if not data.empty:
-        # Get the latest year's data for each city
-        latest_data = data.loc[data.groupby('city')['year'].idxmax()]
+        # Get the latest year's data for each city; sorting years descending keeps the
+        # first row of the latest year, as idxmax did, without a groupby
+        latest_data = data.sort_values(['city', 'year'], ascending=[True, False]).drop_duplicates('city')
+        
+        # Keep only selected cities that have coordinates, and attach those coordinates
+        # with one lookup per column instead of per row
+        latest_data = latest_data[
+            latest_data['city'].isin(selected_cities) & latest_data['city'].isin(CITY_LATITUDES.index)
+        ]
+        change = latest_data['change'].to_numpy() if 'change' in latest_data else None
+        
+        # Determine value based on analysis type, for all cities at once
+        if 'analysis_value' in latest_data:
+            value = latest_data['analysis_value'].to_numpy()
+        elif "inflow" in analysis_type.lower():
+            is_inflow = latest_data['flow_type'].eq('inflow').to_numpy() if 'flow_type' in latest_data else False
+            value = np.where(is_inflow, change, 0)
+        elif "outflow" in analysis_type.lower():
+            is_outflow = latest_data['flow_type'].eq('outflow').to_numpy() if 'flow_type' in latest_data else False
+            value = np.where(is_outflow, -change, 0)
+        else:  # Net migration
+            value = change
         
-        for _, row in latest_data.iterrows():
-            city = row['city']
-            if city in city_coordinates and city in selected_cities:
-                coords = city_coordinates[city]
-                
-                # Determine value based on analysis type
-                if 'analysis_value' in row:
-                    value = row['analysis_value']
-                elif "inflow" in analysis_type.lower():
-                    value = row['change'] if row.get('flow_type') == 'inflow' else 0
-                elif "outflow" in analysis_type.lower():
-                    value = -row['change'] if row.get('flow_type') == 'outflow' else 0
-                else:  # Net migration
-                    value = row['change']
-                
-                map_data.append({
-                    'city': city,
-                    'lat': coords[1],
-                    'lon': coords[0],
-                    'value': value,
-                    'population': row['population'],
-                    'year': row['year']
-                })
-    
-    # Create a DataFrame for the map
-    map_df = pd.DataFrame(map_data)
+        # Create a DataFrame for the map
+        map_df = pd.DataFrame({
+            'city': latest_data['city'].to_numpy(dtype=object),
+            'lat': latest_data['city'].map(CITY_LATITUDES).to_numpy(dtype=float),
+            'lon': latest_data['city'].map(CITY_LONGITUDES).to_numpy(dtype=float),
+            'value': value,
+            'population': latest_data['population'].to_numpy(),
+            'year': latest_data['year'].to_numpy()
+        })
     
     # If no data, return empty figure
     if map_df.empty:
@@ -88,7 +94,7 @@ def create_flow_map(data, selected_cities, analysis_type):
     
     # Create the map
     # Get max absolute value for symmetric color scale
-    max_abs_value = max(abs(map_df['value'].max()), abs(map_df['value'].min())) if not map_df.empty else 0
+    max_abs_value = float(np.nanmax(np.abs(map_df['value'].to_numpy()))) if not map_df.empty else 0
     
     # Create a more detailed base map
     fig = go.Figure()
@@ -99,7 +105,7 @@ def create_flow_map(data, selected_cities, analysis_type):
         lon=map_df['lon'],
         mode='markers',
         marker=dict(
-            size=map_df['population'].apply(lambda x: min(40, max(15, x/100000))),  # Scale by population
+            size=np.clip(map_df['population'].to_numpy(dtype=float) / 100000, 15, 40),  # Scale by population
             color=map_df['value'],
             colorscale='RdBu_r',  # Red for outflow, blue for inflow
             cmin=-max_abs_value,
@@ -114,13 +120,16 @@ def create_flow_map(data, selected_cities, analysis_type):
             opacity=0.8,
             sizemode='diameter'
         ),
-        text=map_df.apply(
-            lambda row: f"<b>{row['city']}</b><br>" +
-                      f"Population: {int(row['population']):,}<br>" +
-                      f"Flow: {int(row['value']):+,}<br>" +
-                      f"Year: {int(row['year'])}",
-            axis=1
-        ),
+        text=[
+            f"<b>{city}</b><br>" +
+            f"Population: {int(population):,}<br>" +
+            f"Flow: {int(value):+,}<br>" +
+            f"Year: {int(year)}"
+            for city, population, value, year in zip(
+                map_df['city'].to_numpy(), map_df['population'].to_numpy(),
+                map_df['value'].to_numpy(), map_df['year'].to_numpy()
+            )
+        ],
         hoverinfo='text',
         name='Cities'
     ))
@@ -147,26 +156,40 @@ def create_flow_map(data, selected_cities, analysis_type):
         center_city = map_df.loc[map_df['value'].idxmax()]
         other_cities = map_df[map_df['city'] != center_city['city']]
         
-        for _, city in other_cities.iterrows():
-            # Only draw lines to/from cities with significant flow
-            if abs(city['value']) > max_abs_value/10:
-                # Line color based on flow direction
-                line_color = 'rgba(65, 105, 225, 0.5)' if city['value'] > 0 else 'rgba(220, 20, 60, 0.5)'
-                # Line width based on flow magnitude
-                line_width = min(5, max(1, abs(city['value']) / max_abs_value * 5))
-                
-                fig.add_trace(go.Scattermapbox(
-                    lat=[center_city['lat'], city['lat']],
-                    lon=[center_city['lon'], city['lon']],
-                    mode='lines',
-                    line=dict(
-                        width=line_width,
-                        color=line_color
-                    ),
-                    opacity=0.7,
-                    hoverinfo='none',
-                    showlegend=False
-                ))
+        # Only draw lines to/from cities with significant flow
+        values = other_cities['value'].to_numpy()
+        significant = np.abs(values) > max_abs_value/10
+        values = values[significant]
+        latitudes = other_cities['lat'].to_numpy()[significant]
+        longitudes = other_cities['lon'].to_numpy()[significant]
+        
+        # Line width based on flow magnitude; lines in the same direction and of exactly
+        # the same width share one trace (widths clipped to 1 or 5 often coincide)
+        line_widths = np.clip(np.abs(values) / max_abs_value * 5, 1, 5)
+        is_inflow = values > 0
+        
+        for inflow, line_width in sorted(set(zip(is_inflow.tolist(), line_widths.tolist()))):
+            in_trace = (is_inflow == inflow) & (line_widths == line_width)
+            
+            # One center-to-city segment per city, separated by NaN gaps
+            segment_lats = np.full(3 * in_trace.sum(), np.nan)
+            segment_lons = np.full(3 * in_trace.sum(), np.nan)
+            segment_lats[0::3], segment_lats[1::3] = center_city['lat'], latitudes[in_trace]
+            segment_lons[0::3], segment_lons[1::3] = center_city['lon'], longitudes[in_trace]
+            
+            fig.add_trace(go.Scattermapbox(
+                lat=segment_lats,
+                lon=segment_lons,
+                mode='lines',
+                line=dict(
+                    width=line_width,
+                    # Line color based on flow direction
+                    color='rgba(65, 105, 225, 0.5)' if inflow else 'rgba(220, 20, 60, 0.5)'
+                ),
+                opacity=0.7,
+                hoverinfo='none',
+                showlegend=False
+            ))
     
     # Set up the mapbox layout
     fig.update_layout(
@@ -219,24 +242,12 @@ def create_trend_chart(data, show_trend_lines=True, normalize_data=False):
     
     # Prepare data for the chart
     if normalize_data:
-        # Normalize to percentage of initial value
-        normalized_data = []
-        for city in data['city'].unique():
-            city_data = data[data['city'] == city].sort_values('year')
-            if len(city_data) > 0:
-                initial_value = city_data['population'].iloc[0]
-                city_data = city_data.copy()
-                city_data['normalized_population'] = city_data['population'] / initial_value * 100
-                normalized_data.append(city_data)
-        
-        if normalized_data:
-            chart_data = pd.concat(normalized_data)
-            y_column = 'normalized_population'
-            y_title = 'Population (% of initial value)'
-        else:
-            chart_data = data
-            y_column = 'population'
-            y_title = 'Population'
+        # Normalize to percentage of each city's initial value
+        chart_data = data.sort_values(['city', 'year'])
+        initial_values = chart_data.groupby('city', observed=True)['population'].transform('first')
+        chart_data['normalized_population'] = chart_data['population'] / initial_values * 100
+        y_column = 'normalized_population'
+        y_title = 'Population (% of initial value)'
     else:
         chart_data = data
         y_column = 'population'
@@ -250,15 +261,21 @@ def create_trend_chart(data, show_trend_lines=True, normalize_data=False):
         city_data = chart_data[chart_data['city'] == city].sort_values('year')
         
         # Create hover text with detailed info
-        hover_text = []
-        for _, row in city_data.iterrows():
-            hover_info = f"<b>{city}</b><br>"
-            hover_info += f"Year: {int(row['year'])}<br>"
-            hover_info += f"Population: {int(row[y_column]):,}<br>"
-            hover_info += f"Change: {int(row['change']):+,}<br>"
-            if 'growth_rate' in row:
-                hover_info += f"Growth Rate: {row['growth_rate']:.2f}%"
-            hover_text.append(hover_info)
+        years = city_data['year'].to_numpy()
+        values = city_data[y_column].to_numpy()
+        changes = city_data['change'].to_numpy()
+        hover_text = [
+            f"<b>{city}</b><br>" +
+            f"Year: {int(year)}<br>" +
+            f"Population: {int(value):,}<br>" +
+            f"Change: {int(change):+,}<br>"
+            for year, value, change in zip(years, values, changes)
+        ]
+        if 'growth_rate' in city_data.columns:
+            hover_text = [
+                text + f"Growth Rate: {growth_rate:.2f}%"
+                for text, growth_rate in zip(hover_text, city_data['growth_rate'].to_numpy())
+            ]
         
         # Add line with custom styling
         fig.add_trace(go.Scatter(
@@ -283,33 +300,56 @@ def create_trend_chart(data, show_trend_lines=True, normalize_data=False):
     
     # Add trend lines if requested
     if show_trend_lines:
-        for city in chart_data['city'].unique():
-            city_data = chart_data[chart_data['city'] == city].sort_values('year')
+        # Closed-form least squares for all cities at once (slope = Sxy / Sxx on
+        # year-centred data), summed per city code with bincount
+        codes, city_names = pd.factorize(chart_data['city'], sort=False)
+        has_city = codes >= 0
+        codes = codes[has_city]
+        years = chart_data['year'].to_numpy()[has_city]
+        x = years.astype(float)
+        y = chart_data[y_column].to_numpy(dtype=float)[has_city]
+        
+        n_cities = len(city_names)
+        points = np.bincount(codes, minlength=n_cities)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_mean = np.bincount(codes, weights=x, minlength=n_cities) / points
+            y_mean = np.bincount(codes, weights=y, minlength=n_cities) / points
+            centred_x = x - x_mean[codes]
+            centred_y = y - y_mean[codes]
+            sxx = np.bincount(codes, weights=centred_x * centred_x, minlength=n_cities)
+            syy = np.bincount(codes, weights=centred_y * centred_y, minlength=n_cities)
+            sxy = np.bincount(codes, weights=centred_x * centred_y, minlength=n_cities)
+            slopes = sxy / sxx
+            r_values = (sxy / np.sqrt(sxx * syy)).clip(-1, 1)  # nan for flat trends, as linregress gives
+        intercepts = y_mean - slopes * x_mean
+        first_years = np.full(n_cities, years.max(initial=0), dtype=years.dtype)
+        last_years = np.full(n_cities, years.min(initial=0), dtype=years.dtype)
+        np.minimum.at(first_years, codes, years)
+        np.maximum.at(last_years, codes, years)
+        
+        # Need at least two distinct years for regression
+        fitted = (points > 1) & (sxx > 0)
+        for city, slope, intercept, r_value, first_year, last_year in zip(
+            np.asarray(city_names, dtype=object)[fitted], slopes[fitted], intercepts[fitted],
+            r_values[fitted], first_years[fitted], last_years[fitted]
+        ):
+            # Generate points for the trend line
+            x_trend = np.array([first_year, last_year])
+            y_trend = intercept + slope * x_trend
             
-            if len(city_data) > 1:  # Need at least two points for regression
-                x = city_data['year'].values
-                y = city_data[y_column].values
-                
-                # Fit a linear regression line
-                slope, intercept, r_value, _, _ = stats.linregress(x, y)
-                
-                # Generate points for the trend line
-                x_trend = np.array([city_data['year'].min(), city_data['year'].max()])
-                y_trend = intercept + slope * x_trend
-                
-                # Add the trend line to the figure
-                fig.add_trace(
-                    go.Scatter(
-                        x=x_trend,
-                        y=y_trend,
-                        mode='lines',
-                        name=f'{city} Trend (r={r_value:.2f})',
-                        line=dict(dash='dash', width=1),
-                        opacity=0.7,
-                        showlegend=False,
-                        hoverinfo='skip'
-                    )
+            # Add the trend line to the figure
+            fig.add_trace(
+                go.Scatter(
+                    x=x_trend,
+                    y=y_trend,
+                    mode='lines',
+                    name=f'{city} Trend (r={r_value:.2f})',
+                    line=dict(dash='dash', width=1),
+                    opacity=0.7,
+                    showlegend=False,
+                    hoverinfo='skip'
                 )
+            )
     
     # Update layout with enhanced styling
     fig.update_layout(
@@ -391,31 +431,24 @@ def create_comparison_chart(data, selected_cities):
         )
         return fig
     
-    # Calculate net migration for each city across all years
-    comparison_data = []
-    
-    for city in selected_cities:
-        city_data = data[data['city'] == city]
-        
-        if not city_data.empty:
-            total_population = city_data['population'].iloc[-1]  # Latest population
-            net_migration = city_data['change'].sum()
-            
-            # Check if growth_rate column exists
-            if 'growth_rate' in city_data.columns:
-                growth_rate = city_data['growth_rate'].mean()
-            else:
-                # Calculate simple growth rate
-                growth_rate = (net_migration / total_population) * 100 if total_population > 0 else 0
-            
-            comparison_data.append({
-                'city': city,
-                'total_population': total_population,
-                'net_migration': net_migration,
-                'growth_rate': growth_rate
-            })
-    
-    comparison_df = pd.DataFrame(comparison_data)
+    # Calculate net migration for each city across all years in one grouped pass,
+    # with rows ordered by year so 'last' is the latest population
+    city_data = data[data['city'].isin(selected_cities)].sort_values('year', kind='stable')
+    aggregations = {
+        'total_population': ('population', 'last'),
+        'net_migration': ('change', 'sum')
+    }
+    # Check if growth_rate column exists
+    if 'growth_rate' in city_data.columns:
+        aggregations['growth_rate'] = ('growth_rate', 'mean')
+    comparison_df = city_data.groupby('city', observed=True).agg(**aggregations).reset_index()
+    
+    if 'growth_rate' not in comparison_df.columns:
+        # Calculate simple growth rate
+        total_population = comparison_df['total_population']
+        comparison_df['growth_rate'] = np.where(
+            total_population > 0, comparison_df['net_migration'] / total_population * 100, 0
+        )
     
     if comparison_df.empty:
         fig = go.Figure()
@@ -426,44 +459,47 @@ def create_comparison_chart(data, selected_cities):
         )
         return fig
     
-    # Sort by net migration
+    # Sort cities from highest to lowest net migration
     comparison_df = comparison_df.sort_values('net_migration', ascending=False)
     
     # Create a more detailed and enhanced comparison visualization
     fig = go.Figure()
     
-    # Sort cities from highest to lowest net migration
-    comparison_df = comparison_df.sort_values('net_migration', ascending=False)
-    
-    # Set color scale based on growth rates
-    max_growth = max(abs(comparison_df['growth_rate'].max()), abs(comparison_df['growth_rate'].min()))
-    
-    # Add bars with custom styling and hover information
-    for i, (_, row) in enumerate(comparison_df.iterrows()):
-        # Determine bar color based on growth rate
-        if row['growth_rate'] > 0:
-            bar_color = f'rgba(65, 105, 225, {min(1.0, 0.4 + abs(row["growth_rate"]/max_growth*0.6))})'  # Blue for positive
-        else:
-            bar_color = f'rgba(220, 20, 60, {min(1.0, 0.4 + abs(row["growth_rate"]/max_growth*0.6))})'  # Red for negative
-            
-        hover_text = (
-            f"<b>{row['city']}</b><br>" +
-            f"Net Migration: {int(row['net_migration']):+,}<br>" +
-            f"Growth Rate: {row['growth_rate']:.2f}%<br>" +
-            f"Total Population: {int(row['total_population']):,}"
-        )
-        
-        fig.add_trace(go.Bar(
-            x=[row['city']],
-            y=[row['net_migration']],
-            name=row['city'],
-            marker_color=bar_color,
-            text=f"{int(row['net_migration']):+,}",
-            textposition='auto',
-            hovertext=hover_text,
-            hoverinfo='text',
-            showlegend=False
-        ))
+    cities = comparison_df['city'].to_numpy(dtype=object)
+    net_migration = comparison_df['net_migration'].to_numpy()
+    growth_rates = comparison_df['growth_rate'].to_numpy()
+    total_population = comparison_df['total_population'].to_numpy()
+    
+    # Set color scale based on growth rates, in one pass over their absolute values
+    max_growth = np.nanmax(np.abs(growth_rates))
+    
+    # Determine bar colors based on growth rate: blue for positive, red for negative,
+    # more opaque the larger the rate, formatted once per bar
+    with np.errstate(invalid='ignore', divide='ignore'):
+        bar_alphas = np.minimum(1.0, 0.4 + np.abs(growth_rates / max_growth * 0.6))
+    bar_rgbs = np.where(growth_rates > 0, '65, 105, 225', '220, 20, 60')
+    bar_colors = [f'rgba({rgb}, {alpha:.3f})' for rgb, alpha in zip(bar_rgbs, bar_alphas)]
+    
+    hover_text = [
+        f"<b>{city}</b><br>" +
+        f"Net Migration: {int(migration):+,}<br>" +
+        f"Growth Rate: {growth_rate:.2f}%<br>" +
+        f"Total Population: {int(population):,}"
+        for city, migration, growth_rate, population in zip(cities, net_migration, growth_rates, total_population)
+    ]
+    
+    # Add all bars as one trace with custom styling and hover information
+    fig.add_trace(go.Bar(
+        x=cities,
+        y=net_migration,
+        name='Net Migration',
+        marker_color=bar_colors,
+        text=[f"{int(migration):+,}" for migration in net_migration],
+        textposition='auto',
+        hovertext=hover_text,
+        hoverinfo='text',
+        showlegend=False
+    ))
     
     # Add a horizontal line at zero for reference
     fig.add_shape(
@@ -475,24 +511,22 @@ def create_comparison_chart(data, selected_cities):
         line=dict(color='black', width=1, dash='dash')
     )
     
-    # Add annotations to show population size
-    for i, (_, row) in enumerate(comparison_df.iterrows()):
-        # Add a small dot above each bar indicating population size
-        fig.add_trace(go.Scatter(
-            x=[row['city']],
-            y=[row['net_migration'] + (max(comparison_df['net_migration']) * 0.05)],
-            mode='markers',
-            marker=dict(
-                size=row['total_population'] / 1000000 * 20,  # Size based on population (in millions)
-                opacity=0.7,
-                color='rgba(100,100,100,0.5)',
-                line=dict(width=1, color='rgba(50,50,50,0.8)')
-            ),
-            name=f"{row['city']} Population",
-            text=f"Population: {int(row['total_population']):,}",
-            hoverinfo='text',
-            showlegend=False
-        ))
+    # Add a small dot above each bar indicating population size, as one trace
+    fig.add_trace(go.Scatter(
+        x=cities,
+        y=net_migration + net_migration.max() * 0.05,
+        mode='markers',
+        marker=dict(
+            size=total_population / 1000000 * 20,  # Size based on population (in millions)
+            opacity=0.7,
+            color='rgba(100,100,100,0.5)',
+            line=dict(width=1, color='rgba(50,50,50,0.8)')
+        ),
+        name='Population',
+        text=[f"Population: {int(population):,}" for population in total_population],
+        hoverinfo='text',
+        showlegend=False
+    ))
     
     # Update layout for better visualization
     fig.update_layout(